@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# Measures how long it takes to parse a placeholder catalog with many files and to update it after a single file was modified.
+# Exits with an error, if the result of an incremental update differs from parsing the modified catalog from scratch
+import logging
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from mkdocs_placeholder_plugin.generic.config_catalog import CatalogState, parse_configuration_catalog, _CATALOGS
+
+FILE_COUNT = 100
+PLACEHOLDERS_PER_FILE = 50
+
+# Base catalog for the checks. NAME and NAMExOTHER overlap, so xNAMExOTHERx references both of them (if both exist)
+CHECK_FILES = {
+    "a.yaml": "placeholders:\n  NAME: name\n  NAMExOTHER: other\n",
+    "b.yaml": "placeholders:\n  USER:\n    default: 'xNAMExOTHERx'\n    allow_nested: true\n  PLAIN: plain\n",
+    "c.yaml": "placeholders:\n  COPY:\n    default: 'xUSERx-xPLAINx'\n    allow_nested: true\n",
+}
+
+# Description -> (file name, new contents of the file)
+CHECK_CHANGES = [
+    ("remove the longer overlapping name", "a.yaml", "placeholders:\n  NAME: name\n"),
+    ("remove the shorter overlapping name", "a.yaml", "placeholders:\n  NAMExOTHER: other\n"),
+    ("add the longer overlapping name", "a.yaml", "placeholders:\n  NAME: name\n  NAMExOTHER: other\n"),
+    ("rename a referenced placeholder", "b.yaml", "placeholders:\n  USER:\n    default: 'xNAMExOTHERx'\n    allow_nested: true\n  PLAIN2: plain\n"),
+    ("add a name that overlaps with a reference", "a.yaml", "placeholders:\n  NAME: name\n  NAMExOTHER: other\n  NAMEx: new\n"),
+    ("change a nested default value", "b.yaml", "placeholders:\n  USER:\n    default: 'xNAMEx/xNAMExOTHERx'\n    allow_nested: true\n  PLAIN: plain\n"),
+]
+
+
+def write_files(directory: str, files: dict[str,str]) -> list[str]:
+    for name, contents in files.items():
+        with open(os.path.join(directory, name), "w") as f:
+            f.write(contents)
+    return [os.path.join(directory, name) for name in sorted(files)]
+
+
+def compare_states(label: str, incremental: CatalogState, full: CatalogState) -> list[str]:
+    errors = []
+    if sorted(incremental.config.placeholders) != sorted(full.config.placeholders):
+        errors.append(f"{label}: The placeholders differ")
+    # The stored direct dependencies are reused by the next update, so they need to be correct even if a difference is not (yet) visible in the config
+    if incremental.dependencies != full.dependencies:
+        errors.append(f"{label}: The dependencies differ: {incremental.dependencies} != {full.dependencies}")
+    if dict(incremental.config.nested_placeholders) != dict(full.config.nested_placeholders):
+        errors.append(f"{label}: The nested placeholders differ")
+    if incremental.config.expanded_default_values != full.config.expanded_default_values:
+        errors.append(f"{label}: The expanded default values differ: {incremental.config.expanded_default_values} != {full.config.expanded_default_values}")
+    return errors
+
+
+def run_checks(directory: str) -> list[str]:
+    errors = []
+    files = dict(CHECK_FILES)
+    paths = write_files(directory, files)
+    parse_configuration_catalog(paths, "incremental")
+    for index, (label, name, contents) in enumerate(CHECK_CHANGES):
+        files[name] = contents
+        paths = write_files(directory, files)
+        parse_configuration_catalog(paths, "incremental")
+        # A new location has no previous state, so everything is parsed from scratch
+        parse_configuration_catalog(paths, f"full-{index}")
+        errors += compare_states(label, _CATALOGS["incremental"], _CATALOGS[f"full-{index}"])
+    return errors
+
+
+def create_benchmark_files() -> dict[str,str]:
+    # Each file references the placeholders of the previous file
+    files = {}
+    for file_index in range(FILE_COUNT):
+        lines = ["placeholders:"]
+        for index in range(PLACEHOLDERS_PER_FILE):
+            if file_index > 0 and index % 5 == 0:
+                lines.append(f"  F{file_index}P{index}:\n    default: 'xF{file_index - 1}P{index}x'\n    allow_nested: true")
+            else:
+                lines.append(f"  F{file_index}P{index}: value{index}")
+        files[f"file{file_index:03}.yaml"] = "\n".join(lines) + "\n"
+    return files
+
+
+def main() -> None:
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as directory:
+        errors = run_checks(directory)
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = create_benchmark_files()
+        paths = write_files(directory, files)
+        start = time.perf_counter()
+        parse_configuration_catalog(paths, "benchmark")
+        print(f"parse {FILE_COUNT} files with {FILE_COUNT * PLACEHOLDERS_PER_FILE} placeholders: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+        name = "file050.yaml"
+        files[name] = files[name].replace("value1\n", "modified\n")
+        paths = write_files(directory, files)
+        start = time.perf_counter()
+        parse_configuration_catalog(paths, "benchmark")
+        print(f"update after modifying a single file: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    if errors:
+        print("[!] Failed checks:")
+        for error in errors:
+            print(f" - {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# Measures how HtmlTagHandler.process_string scales with the page size.
+# The time per tag should stay about the same, since the replacements are collected and applied once
+import logging
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from mkdocs_placeholder_plugin.generic.config.configuration import parse_configuration
+from mkdocs_placeholder_plugin.generic.html_tag_handler import NormalHtmlInputElementHandler
+
+PLACEHOLDER_COUNT = 100
+TAG_COUNTS = [1000, 2000, 4000, 8000, 16000]
+
+
+def create_page(tag_count: int) -> str:
+    return "".join(f'<p>{"lorem ipsum " * 20}</p>\n<input data-input-for="NAME_{i % PLACEHOLDER_COUNT}" class="a">\n'
+                   for i in range(tag_count))
+
+
+def main() -> None:
+    # The handler warns about every input element, which would make the output unreadable
+    logging.disable(logging.WARNING)
+    config = parse_configuration({"placeholders": {f"NAME_{i}": "value" for i in range(PLACEHOLDER_COUNT)}}, "benchmark")
+    handler = NormalHtmlInputElementHandler(config.placeholders, False)
+
+    print(f"{'tags':>8} {'page size':>12} {'time':>10} {'per tag':>10}")
+    for tag_count in TAG_COUNTS:
+        page = create_page(tag_count)
+        start = time.perf_counter()
+        handler.process_string("benchmark.html", page)
+        duration = time.perf_counter() - start
+        print(f"{tag_count:>8} {len(page) / 1e6:>10.2f}MB {duration * 1000:>8.1f}ms {duration / tag_count * 1e6:>8.2f}us")
+
+
+if __name__ == "__main__":
+    main()
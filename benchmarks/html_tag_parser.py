@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# Checks that scan_html_opening_tag gives the same results as the HTMLParser based path and measures how much faster it is.
+# Exits with an error, if a check fails
+import os
+import random
+import re
+import sys
+import timeit
+from typing import Optional
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from mkdocs_placeholder_plugin.generic.html_tag_handler import HtmlTagHandler, MAX_TAG_END_CANDIDATES
+from mkdocs_placeholder_plugin.generic.html_tag_parser import ParsedHtmlTag, parse_html_tag, scan_html_opening_tag
+
+# The search input of mkdocs-material, which is on every page
+SEARCH_INPUT = '<input class="md-input md-search__input" type="text" placeholder="Search" aria-label="Search" autocapitalize="off" autocorrect="off" autocomplete="off" spellcheck="false" data-md-component="search-query" required>'
+
+# (html, expected result of HtmlTagHandler.try_find_where_tag_ends, whether the fast scanner should handle it)
+REGRESSION_CASES: list[tuple[str, Optional[tuple[int,ParsedHtmlTag]], bool]] = [
+    (SEARCH_INPUT + "<p>", (len(SEARCH_INPUT), ParsedHtmlTag("input", {
+        "class": "md-input md-search__input", "type": "text", "placeholder": "Search", "aria-label": "Search", "autocapitalize": "off",
+        "autocorrect": "off", "autocomplete": "off", "spellcheck": "false", "data-md-component": "search-query", "required": "",
+    })), True),
+    ('<input data-input-for="A" value="x &amp; y">', (44, ParsedHtmlTag("input", {"data-input-for": "A", "value": "x & y"})), True),
+    # Whitespace between '=' and a quoted value containing '>'. The HTMLParser path ends the tag at the first '>' and returns
+    # the bogus attribute "'b" (end 10). Browsers (and the scanner) treat 'b>' as the quoted value
+    ("<a A=  'b>'>", (12, ParsedHtmlTag("a", {"a": "b>"})), True),
+    # Duplicate attributes are not handled by the scanner. The fallback parser rejects them, so the tag is skipped
+    ('<input data-input-for="A" data-input-for="B">', None, False),
+    ('<input DATA-INPUT-FOR="A" data-input-for="B">', None, False),
+    # Non-ASCII whitespace is left to the fallback parser
+    ('<input\xa0data-input-for="A">', (26, ParsedHtmlTag("input\xa0data-input-for=\"a\"", {})), False),
+]
+
+# Whitespace around '=', followed by a quoted value that contains a '>' (see the regression case above)
+KNOWN_DIFFERENCE_REGEX = re.compile(r"""(?:\s=|=\s+)["'][^"']*>""")
+
+
+def find_where_tag_ends_without_scanner(html: str, start: int) -> Optional[tuple[int,ParsedHtmlTag]]:
+    """
+    The HTMLParser based path of HtmlTagHandler.try_find_where_tag_ends
+    """
+    search_pos = start
+    for _ in range(MAX_TAG_END_CANDIDATES):
+        end = html.find(">", search_pos)
+        if end == -1:
+            break
+        end += 1
+        try:
+            return (end, parse_html_tag(html[start:end]))
+        except Exception:
+            search_pos = end
+    return None
+
+
+def check_regression_cases() -> list[str]:
+    handler = HtmlTagHandler(re.compile("<"), None, False)
+    errors = []
+    for html, expected, handled_by_scanner in REGRESSION_CASES:
+        result = handler.try_find_where_tag_ends(html, 0)
+        if result != expected:
+            errors.append(f"{html!r}: expected {expected}, got {result}")
+        if (scan_html_opening_tag(html, 0) is not None) != handled_by_scanner:
+            errors.append(f"{html!r}: expected the scanner to {'handle' if handled_by_scanner else 'reject'} it")
+        if not handled_by_scanner and result != find_where_tag_ends_without_scanner(html, 0):
+            errors.append(f"{html!r}: the result differs from the fallback parser")
+    return errors
+
+
+def random_tag(rng: random.Random) -> str:
+    whitespace = [" ", "\n", "\t", "  ", "\xa0", "\r\n"]
+    names = ["a", "data-input-for", "CLASS", "x:y", "_q", "value", "title", "a.b", "@c", "1a"]
+    values = ['"x"', "'y'", "z", '"a>b"', "'a\"b'", '"&amp;&lt;&#39;&bogus;"', "q/", '""', "a`b", "é", '"\xa0"', "a\xa0b"]
+    html = rng.choice(["<input", "<INPUT", "<div", "<a"])
+    for _ in range(rng.randint(0, 4)):
+        html += rng.choice(whitespace) + rng.choice(names)
+        if rng.random() < 0.7:
+            html += rng.choice(["", " ", "  ", "\xa0"]) + "=" + rng.choice(["", " ", "  "]) + rng.choice(values)
+    return html + rng.choice(["", " ", "/", " /", "\xa0"]) + ">" + rng.choice(["", "tail>", "<p>", "'>"])
+
+
+def compare_with_fallback_parser(count: int) -> tuple[int, int, list[str]]:
+    """
+    Returns how many random tags the scanner handled, how many of them differ in the known way, and all other differences
+    """
+    rng = random.Random(1)
+    handled = known_differences = 0
+    errors = []
+    for _ in range(count):
+        html = random_tag(rng)
+        result = scan_html_opening_tag(html, 0)
+        if result is None:
+            continue
+
+        handled += 1
+        expected = find_where_tag_ends_without_scanner(html, 0)
+        if result != expected:
+            if KNOWN_DIFFERENCE_REGEX.search(html):
+                known_differences += 1
+            else:
+                errors.append(f"{html!r}: scanner returned {result}, fallback parser returned {expected}")
+    return handled, known_differences, errors
+
+
+def main() -> None:
+    errors = check_regression_cases()
+    print(f"Regression cases: {len(REGRESSION_CASES)} cases, {len(errors)} failed checks")
+
+    count = 20000
+    handled, known_differences, fuzz_errors = compare_with_fallback_parser(count)
+    print(f"Random tags: {handled} of {count} handled by the scanner, {known_differences} known differences, {len(fuzz_errors)} unexpected differences")
+    errors += fuzz_errors
+
+    html = "<p>Some text</p>" + SEARCH_INPUT + "\n<p>more</p>"
+    start = len("<p>Some text</p>")
+    number = 20000
+    fallback_time = timeit.timeit(lambda: find_where_tag_ends_without_scanner(html, start), number=number) / number
+    scanner_time = timeit.timeit(lambda: scan_html_opening_tag(html, start), number=number) / number
+    print(f"mkdocs-material search input: HTMLParser path {fallback_time * 1e6:.1f}us, scanner {scanner_time * 1e6:.1f}us ({fallback_time / scanner_time:.1f}x faster)")
+
+    if errors:
+        print("\n[!] Failed checks:")
+        for error in errors[:20]:
+            print(f" - {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# Measures how long parsing a placeholder file with 10k (nested) placeholders takes.
+# Finding the nested placeholders and the cycles should scale linearly, long chains must not hit Python's recursion limit.
+# Exits with an error, if one of the configurations can not be parsed or the cycles are not reported
+import logging
+import os
+import random
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from mkdocs_placeholder_plugin.generic import PlaceholderConfigError
+from mkdocs_placeholder_plugin.generic.config.configuration import parse_configuration_bytes
+from mkdocs_placeholder_plugin.generic.config.cyclic_dependency_detector import DependencyGraph
+
+PLACEHOLDER_COUNT = 10_000
+
+
+def nested(name: str, default: str) -> str:
+    return f"  {name}:\n    default: '{default}'\n    allow_nested: true"
+
+
+def create_random_dag() -> bytes:
+    # 30% of the placeholders contain 3 placeholders, that were defined before them
+    random.seed(1)
+    lines = ["placeholders:"]
+    for i in range(PLACEHOLDER_COUNT):
+        if i > 10 and random.random() < 0.3:
+            references = " ".join(f"xP{random.randrange(i)}x" for _ in range(3))
+            lines.append(nested(f"P{i}", f"a {references} b"))
+        else:
+            lines.append(f"  P{i}: value{i}")
+    return "\n".join(lines).encode()
+
+
+def create_chain() -> bytes:
+    lines = ["placeholders:", "  P0: end"]
+    lines += [nested(f"P{i}", f"xP{i - 1}x") for i in range(1, PLACEHOLDER_COUNT)]
+    return "\n".join(lines).encode()
+
+
+def create_reverse_chain() -> bytes:
+    # Each placeholder references the next one, so the dependencies are found in the opposite order than they are defined
+    lines = ["placeholders:"]
+    lines += [nested(f"P{i}", f"xP{i + 1}x") for i in range(PLACEHOLDER_COUNT - 1)]
+    lines.append(f"  P{PLACEHOLDER_COUNT - 1}: end")
+    return "\n".join(lines).encode()
+
+
+def create_chain_with_cycles() -> bytes:
+    # Two separate loops at the end of a long chain. Both should be reported in the same error
+    lines = ["placeholders:"]
+    lines += [nested(f"P{i}", f"xP{i + 1}x") for i in range(PLACEHOLDER_COUNT - 4)]
+    lines.append(nested(f"P{PLACEHOLDER_COUNT - 4}", f"xP{PLACEHOLDER_COUNT - 3}x xP{PLACEHOLDER_COUNT - 1}x"))
+    lines.append(nested(f"P{PLACEHOLDER_COUNT - 3}", f"xP{PLACEHOLDER_COUNT - 2}x"))
+    lines.append(nested(f"P{PLACEHOLDER_COUNT - 2}", f"xP{PLACEHOLDER_COUNT - 3}x"))
+    lines.append(nested(f"P{PLACEHOLDER_COUNT - 1}", f"xP{PLACEHOLDER_COUNT - 1}x"))
+    return "\n".join(lines).encode()
+
+
+def main() -> None:
+    logging.disable(logging.WARNING)
+    errors = []
+    print(f"{'configuration':<40} {'parse':>10} {'graph':>10}")
+    for label, data in [
+        ("random DAG (30% nested, 3 refs each)", create_random_dag()),
+        ("chain of nested placeholders", create_chain()),
+        ("chain declared in reverse order", create_reverse_chain()),
+    ]:
+        start = time.perf_counter()
+        try:
+            config = parse_configuration_bytes(data, "benchmark.yaml")
+        except RecursionError:
+            errors.append(f"{label}: RecursionError")
+            continue
+        parse_duration = time.perf_counter() - start
+
+        # The part of the parsing, that finds the nested placeholders and checks for loops
+        start = time.perf_counter()
+        DependencyGraph(config, "benchmark.yaml").ensure_no_cycles_exist()
+        graph_duration = time.perf_counter() - start
+        print(f"{label:<40} {parse_duration:>9.2f}s {graph_duration:>9.2f}s")
+
+    try:
+        parse_configuration_bytes(create_chain_with_cycles(), "benchmark.yaml")
+        errors.append("chain with cycles: No error was raised")
+    except PlaceholderConfigError as ex:
+        for name in [f"P{PLACEHOLDER_COUNT - 3}", f"P{PLACEHOLDER_COUNT - 1}"]:
+            if name not in str(ex):
+                errors.append(f"chain with cycles: The loop of {name} is missing in the error message: {ex}")
+
+    if errors:
+        print("[!] Failed checks:")
+        for error in errors:
+            print(f" - {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Checks that StreamingPageProcessor keeps the peak memory usage (measured with tracemalloc) bounded, independent of the page size.
+The page is built from the rendered documentation, so it contains input elements, automatic tables, and markers.
+Exits with an error, if the output differs from PageProcessor.process_page_html or the peak memory usage is too high or grows with the page size.
+Runs as part of run-checks.sh.
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import markdown
+import yaml
+from mkdocs_placeholder_plugin.generic import set_warnings_enabled
+from mkdocs_placeholder_plugin.generic.config.configuration import parse_configuration
+from mkdocs_placeholder_plugin.generic.page_processor import PageProcessor
+from mkdocs_placeholder_plugin.generic.page_stream import StreamingPageProcessor, DEFAULT_CHUNK_SIZE
+from mkdocs_placeholder_plugin.mkdocs.markdown_extension import PlaceholderMarkdownExtension
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def render_documentation(page_processor: PageProcessor) -> str:
+    parts = ["<h1>Benchmark</h1>"]
+    for path in sorted(glob.glob(os.path.join(REPO_DIR, "docs", "**", "*.md"), recursive=True)):
+        with open(path, encoding="utf-8") as f:
+            contents = f.read()
+        # Markers instead of the final HTML, so that the pages also need to be processed by the marker step
+        extension = PlaceholderMarkdownExtension(page_processor.dynamic_placeholder_preprocessor, use_markers=True)
+        parts.append(markdown.markdown(contents, extensions=["attr_list", "tables", "md_in_html", extension]))
+    return "".join(parts)
+
+
+def write_page(path: str, block: str, size: int) -> None:
+    # Written block by block, so that the page is never completely in memory
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(size // len(block) + 1):
+            f.write(block)
+
+
+def measure_streaming(page_processor: PageProcessor, chunk_size: int, input_path: str, output_path: str) -> tuple[float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(input_path, encoding="utf-8") as input, open(output_path, "w", encoding="utf-8") as output:
+        StreamingPageProcessor(page_processor, chunk_size).process_stream("benchmark.html", input, output)
+    duration = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return duration, peak
+
+
+def measure_whole_page(page_processor: PageProcessor, input_path: str, output_path: str) -> tuple[float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(input_path, encoding="utf-8") as f:
+        html = f.read()
+    result = page_processor.process_page_html("benchmark.html", html)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(result)
+    del html, result
+    duration = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return duration, peak
+
+
+def files_are_equal(path_a: str, path_b: str) -> bool:
+    with open(path_a, "rb") as a, open(path_b, "rb") as b:
+        while True:
+            chunk_a, chunk_b = a.read(1 << 20), b.read(1 << 20)
+            if chunk_a != chunk_b:
+                return False
+            if not chunk_a:
+                return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50], metavar="MB", help="page sizes to stream. Default: %(default)s")
+    parser.add_argument("--compare-size", type=int, default=10, metavar="MB", help="page size that is also processed as a whole, to compare the output and memory usage. Default: %(default)s")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="characters read at once. Default: %(default)s")
+    parser.add_argument("--max-peak", type=float, default=16, metavar="FACTOR", help="allowed peak memory usage as a multiple of the chunk size. Default: %(default)s")
+    args = parser.parse_args()
+
+    set_warnings_enabled(False)
+    with open(os.path.join(REPO_DIR, "placeholder-plugin.yaml"), encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    # The fallback adds the most work (and output) to each input element
+    data.setdefault("settings", {})["create_no_js_fallback"] = True
+    config = parse_configuration(data, "placeholder-plugin.yaml")
+    page_processor = PageProcessor(config, unique="benchmark")
+    block = render_documentation(page_processor)
+    max_peak = args.max_peak * args.chunk_size
+    errors = []
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        input_path = os.path.join(temporary_dir, "input.html")
+        streamed_path = os.path.join(temporary_dir, "streamed.html")
+        whole_path = os.path.join(temporary_dir, "whole.html")
+
+        write_page(input_path, block, args.compare_size * 1_000_000)
+        duration, peak = measure_whole_page(page_processor, input_path, whole_path)
+        print(f"{args.compare_size:>5} MB page, whole page: {duration:6.2f}s, peak {peak / 1e6:7.1f} MB")
+        duration, peak = measure_streaming(page_processor, args.chunk_size, input_path, streamed_path)
+        print(f"{args.compare_size:>5} MB page, streaming:  {duration:6.2f}s, peak {peak / 1e6:7.1f} MB")
+        if not files_are_equal(streamed_path, whole_path):
+            errors.append(f"The streamed output of the {args.compare_size} MB page differs from the whole page output")
+        os.remove(whole_path)
+
+        first_peak = None
+        for size in args.sizes:
+            write_page(input_path, block, size * 1_000_000)
+            duration, peak = measure_streaming(page_processor, args.chunk_size, input_path, streamed_path)
+            print(f"{size:>5} MB page, streaming:  {duration:6.2f}s, peak {peak / 1e6:7.1f} MB")
+            if peak > max_peak:
+                errors.append(f"Peak memory usage for the {size} MB page is {peak / 1e6:.1f} MB, but only {max_peak / 1e6:.1f} MB are allowed")
+            if first_peak is None:
+                first_peak = peak
+            elif peak > first_peak + args.chunk_size:
+                # Small differences are expected, since the chunks end at different positions in the page
+                errors.append(f"Peak memory usage grows with the page size: {first_peak / 1e6:.1f} MB for {args.sizes[0]} MB, but {peak / 1e6:.1f} MB for {size} MB")
+
+    if errors:
+        print("\n[!] Failed checks:")
+        for error in errors:
+            print(f" - {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
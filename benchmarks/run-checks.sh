@@ -0,0 +1,14 @@
+#!/usr/bin/env bash
+# Runs the scripts, that check results and resource limits (not just measure them). Exits with an error, if one of them fails
+
+# If something fails, exit immediately
+set -e
+
+# Switch into the script directory
+cd "$( dirname "${BASH_SOURCE[0]}" )"
+
+for script in html_tag_parser.py page_stream_memory.py nested_placeholders.py validators.py config_catalog.py; do
+    echo "[*] Running $script"
+    python3 "$script"
+done
+echo "[+] All checks passed"
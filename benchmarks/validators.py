@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# Measures how long it takes to check default values against the built-in validator presets.
+# Repeated checks of the same value should be much faster, since the results are stored per validator and value.
+# Exits with an error, if a cached result differs from the result for a fresh validator
+import logging
+import os
+import random
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from mkdocs_placeholder_plugin.generic.config.configuration import parse_configuration_bytes
+from mkdocs_placeholder_plugin.generic.validators import VALIDATOR_PRESETS, Validator, ensure_validator_presets_loaded, convert_to_proper_validators, \
+    check_if_matches_validator, assert_matches_one_validator
+
+ROUNDS = 200
+DEFAULT_COUNT = 3000
+SAMPLES = ["192.168.0.1", "10.0.0.0/8", "fe80::1", "example.com", "https://example.com/a?b=c", "user@example.com",
+           "/etc/passwd", "C:\\Windows\\x.txt", "8080", "-12", "3.14e5", "aa:bb:cc:dd:ee:ff", "", "hello world", "eth0", "x" * 40]
+
+
+def create_validators() -> dict[str,Validator]:
+    # New objects do not have any stored results
+    return convert_to_proper_validators(VALIDATOR_PRESETS)
+
+
+def time_checks(validators: dict[str,Validator], suffix_per_round: bool) -> float:
+    start = time.perf_counter()
+    for round_index in range(ROUNDS):
+        suffix = str(round_index) if suffix_per_round else ""
+        for validator in validators.values():
+            for sample in SAMPLES:
+                check_if_matches_validator(validator, sample + suffix)
+    return (time.perf_counter() - start) / ROUNDS
+
+
+def main() -> None:
+    logging.disable(logging.WARNING)
+    ensure_validator_presets_loaded()
+    validators = create_validators()
+    errors = []
+    checks_per_round = len(validators) * len(SAMPLES)
+    print(f"{len(validators)} validators with {sum(len(v.rules) for v in validators.values())} rules, {checks_per_round} checks per round")
+    print(f"distinct values: {time_checks(validators, True) * 1000:.2f}ms per round")
+    print(f"repeated values: {time_checks(validators, False) * 1000:.2f}ms per round")
+
+    fresh_validators = create_validators()
+    for id, validator in validators.items():
+        for sample in SAMPLES:
+            if check_if_matches_validator(validator, sample) != check_if_matches_validator(fresh_validators[id], sample):
+                errors.append(f"Stored result of validator '{id}' for '{sample}' differs from a fresh validator")
+
+    # Only the pairs that pass, since assert_matches_one_validator raises an exception otherwise
+    passing = [(id, sample) for id, validator in fresh_validators.items() for sample in SAMPLES
+               if not check_if_matches_validator(validator, sample).errors]
+    random.seed(1)
+    work = [random.choice(passing) for _ in range(DEFAULT_COUNT)]
+    durations = []
+    for _ in range(7):
+        fresh_validators = create_validators()
+        start = time.perf_counter()
+        for id, sample in work:
+            assert_matches_one_validator([fresh_validators[id]], sample)
+        durations.append(time.perf_counter() - start)
+    print(f"validate {DEFAULT_COUNT} defaults ({len(set(work))} distinct validator/value pairs) with fresh validators: {min(durations) * 1000:.2f}ms")
+
+    # The same through the configuration parser, where the placeholders share the validators and default values
+    lines = ["placeholders:"]
+    for index, (id, sample) in enumerate(work):
+        lines.append(f"  P{index}:\n    default: {sample!r}\n    validators: {id}")
+    data = "\n".join(lines).encode()
+    durations = []
+    for _ in range(5):
+        start = time.perf_counter()
+        parse_configuration_bytes(data, "benchmark.yaml")
+        durations.append(time.perf_counter() - start)
+    print(f"parse {DEFAULT_COUNT} placeholders with validators: {min(durations) * 1000:.1f}ms")
+
+    if errors:
+        print("[!] Failed checks:")
+        for error in errors:
+            print(f" - {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
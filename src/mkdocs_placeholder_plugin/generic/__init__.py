@@ -14,12 +14,24 @@ class PlaceholderPageError(Exception):
     pass
 
 
+from contextlib import contextmanager
 import logging
+import threading
+from typing import Iterator
 
 # Set up a logger for my code to use
 LOGGER = logging.getLogger("dev.six-two.placeholder-plugin")
 
 _WARNINGS_ENABLED = True
+# Pages may be processed in multiple threads, so each thread records its own warnings (see record_warnings)
+_THREAD_LOCAL = threading.local()
+
+def _get_warning_recorders() -> list[list[str]]:
+    recorders = getattr(_THREAD_LOCAL, "warning_recorders", None)
+    if recorders is None:
+        recorders = []
+        _THREAD_LOCAL.warning_recorders = recorders
+    return recorders
 
 def set_logger(logger: logging.Logger) -> None:
     global LOGGER
@@ -34,7 +46,24 @@ def set_warnings_enabled(value: bool) -> None:
 def warning(message: str) -> None:
     if _WARNINGS_ENABLED:
         LOGGER.warning(f"[placeholder] {message}")
+    for recorder in _get_warning_recorders():
+        recorder.append(message)
 
 def debug(message: str) -> None:
     LOGGER.debug(f"[placeholder] {message}")
 
+
+@contextmanager
+def record_warnings() -> Iterator[list[str]]:
+    """
+    Collects all warning messages that are emitted inside the `with` block.
+    Useful if the results of an operation are cached and the warnings need to be shown again later
+    """
+    messages: list[str] = []
+    recorders = _get_warning_recorders()
+    recorders.append(messages)
+    try:
+        yield messages
+    finally:
+        # Compare by identity, since list.remove compares by equality
+        recorders[:] = [recorder for recorder in recorders if recorder is not messages]
@@ -0,0 +1,119 @@
+import json
+import re
+from typing import Callable, NamedTuple
+from urllib.parse import quote
+# local
+from .. import PlaceholderConfigError
+
+# Matches substitutions like '{{ NAME }}' or '{{ NAME | lower | replace(" ", "_") }}'
+SUBSTITUTION_REGEX = re.compile(r"\{\{(.*?)\}\}", re.DOTALL)
+# Matches a single filter like 'upper' or 'replace(" ", "_")'
+FILTER_REGEX = re.compile(r"^\s*([a-z_]+)\s*(?:\((.*)\))?\s*$", re.DOTALL)
+
+
+def _replace(value: str, old: str, new: str) -> str:
+    return value.replace(old, new)
+
+def _urlencode(value: str) -> str:
+    # Same characters as JavaScript's encodeURIComponent
+    return quote(value, safe="-_.!~*'()")
+
+# Filter name -> implementation. Keep in sync with TEMPLATE_FILTERS in computed_template.ts
+TEMPLATE_FILTERS: dict[str,Callable[...,str]] = {
+    "lower": str.lower,
+    "replace": _replace,
+    "upper": str.upper,
+    "urlencode": _urlencode,
+}
+# Filter name -> number of arguments
+TEMPLATE_FILTER_ARGUMENT_COUNTS = {
+    "lower": 0,
+    "replace": 2,
+    "upper": 0,
+    "urlencode": 0,
+}
+
+
+class TemplateFilter(NamedTuple):
+    name: str
+    arguments: list[str]
+
+
+class TemplatePart(NamedTuple):
+    """
+    A part of a parsed template. It is either literal text or the value of a placeholder (after applying the filters)
+    """
+    text: str
+    # Empty for literal text
+    placeholder: str
+    filters: list[TemplateFilter]
+
+
+def parse_template(template: str) -> list[TemplatePart]:
+    """
+    Splits a template like 'https://{{ HOST | lower }}/' into its parts, so that it does not need to be parsed again when it is evaluated
+    """
+    parts: list[TemplatePart] = []
+    position = 0
+    for match in SUBSTITUTION_REGEX.finditer(template):
+        if match.start() > position:
+            parts.append(TemplatePart(template[position:match.start()], "", []))
+
+        name, *filter_strings = match[1].split("|")
+        name = name.strip()
+        if not name:
+            raise PlaceholderConfigError(f"Template substitution '{match[0]}' does not contain a placeholder name")
+        parts.append(TemplatePart("", name, [parse_template_filter(x) for x in filter_strings]))
+        position = match.end()
+
+    if position < len(template):
+        parts.append(TemplatePart(template[position:], "", []))
+    return parts
+
+
+def parse_template_filter(filter_string: str) -> TemplateFilter:
+    match = FILTER_REGEX.match(filter_string)
+    if not match:
+        raise PlaceholderConfigError(f"Invalid template filter '{filter_string.strip()}'. Filters should look like 'upper' or 'replace(\"old\", \"new\")'")
+
+    name = match[1]
+    if name not in TEMPLATE_FILTERS:
+        raise PlaceholderConfigError(f"Unknown template filter '{name}'. The available filters are: {', '.join(TEMPLATE_FILTERS)}")
+
+    arguments: list = []
+    if match[2] is not None and match[2].strip():
+        try:
+            # The arguments use the same syntax as JSON strings
+            arguments = json.loads(f"[{match[2]}]")
+        except json.JSONDecodeError:
+            raise PlaceholderConfigError(f"Template filter '{name}': Could not parse the arguments '{match[2]}'. They should be quoted strings like \"example\"")
+
+    if any(type(argument) != str for argument in arguments):
+        raise PlaceholderConfigError(f"Template filter '{name}': All arguments need to be strings, but got {arguments}")
+    if len(arguments) != TEMPLATE_FILTER_ARGUMENT_COUNTS[name]:
+        raise PlaceholderConfigError(f"Template filter '{name}' expects {TEMPLATE_FILTER_ARGUMENT_COUNTS[name]} argument(s), but got {len(arguments)}")
+    if name == "replace" and not arguments[0]:
+        # Python and JavaScript handle empty search strings differently
+        raise PlaceholderConfigError("Template filter 'replace': The text to replace can not be empty")
+
+    return TemplateFilter(name, arguments)
+
+
+def get_template_placeholder_names(parts: list[TemplatePart]) -> list[str]:
+    """
+    Returns the names of the placeholders used in the template in the order of their first usage
+    """
+    return list(dict.fromkeys(part.placeholder for part in parts if part.placeholder))
+
+
+def evaluate_template(parts: list[TemplatePart], values: dict[str,str]) -> str:
+    result = []
+    for part in parts:
+        if part.placeholder:
+            value = values[part.placeholder]
+            for template_filter in part.filters:
+                value = TEMPLATE_FILTERS[template_filter.name](value, *template_filter.arguments)
+            result.append(value)
+        else:
+            result.append(part.text)
+    return "".join(result)
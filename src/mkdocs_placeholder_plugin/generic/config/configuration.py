@@ -1,15 +1,20 @@
+from collections.abc import Mapping
 import os
 from typing import NamedTuple
 # pip packages
 import yaml
 # local
 from .. import PlaceholderConfigError
-from .parser_utils import assert_no_unknown_fields, get_bool, get_int, get_string, get_dict, add_problematic_data_to_exceptions
+from .parser_utils import assert_no_unknown_fields, get_bool, get_int, get_list, get_string, get_dict, add_problematic_data_to_exceptions
 from .validator import Validator, parse_validators
 from .placeholder import Placeholder, parse_placeholders
 
+# libyaml's loader is much faster than the pure Python one, but it is only available if PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 # Valid values for normal_is_alias_for
 ALLOWED_REPLACE_SCHEMES = ["dynamic", "editable", "html", "static"]
+# Valid values for disabled_replace_modes
+REPLACE_MODES = ["dynamic", "editable", "html", "normal", "static"]
 
 CONFIGURATION_FIELD_NAMES = {
     "placeholders",
@@ -22,6 +27,7 @@ SETTINGS_FIELD_NAMES = {
     "auto_placeholder_tables",
     "create_no_js_fallback",
     "debug_javascript",
+    "disabled_replace_modes",
     "dynamic_prefix",
     "dynamic_suffix",
     "editable_prefix",
@@ -41,6 +47,13 @@ SETTINGS_FIELD_NAMES = {
     "static_suffix",
 }
 
+# The settings, that can be changed for a single page via the 'placeholder' key in the page's front matter
+PAGE_SETTINGS_FIELD_NAMES = {
+    "auto_placeholder_tables",
+    "create_no_js_fallback",
+    "disabled_replace_modes",
+}
+
 class PlaceholderSettings(NamedTuple):
     apply_change_on_focus_change: bool
     auto_placeholder_tables: bool
@@ -48,6 +61,8 @@ class PlaceholderSettings(NamedTuple):
     create_no_js_fallback: bool
     # debug the javascript code
     debug_javascript: bool
+    # The replace modes, that are not used. Their tokens are left as they are and the pages are not searched for them
+    disabled_replace_modes: list[str]
     # Default prefixes / suffixes used for different replacement methods
     dynamic_prefix: str
     dynamic_suffix: str
@@ -76,6 +91,10 @@ class PlaceholderConfig(NamedTuple):
     placeholders: dict[str,Placeholder]
     settings: PlaceholderSettings
     validators: dict[str,Validator]
+    # Placeholder name -> names of all placeholders it (directly or indirectly) depends on (see NestedPlaceholders)
+    nested_placeholders: Mapping[str,frozenset[str]]
+    # Placeholder name -> default value with all nested placeholders replaced (see expand_default_values)
+    expanded_default_values: dict[str,str]
 
 
 @add_problematic_data_to_exceptions
@@ -87,6 +106,8 @@ def parse_settings(data: dict, location: str) -> PlaceholderSettings:
         auto_placeholder_tables=get_bool(data, "auto_placeholder_tables", default=True),
         create_no_js_fallback=get_bool(data, "create_no_js_fallback", default=True),
         debug_javascript=get_bool(data, "debug_javascript", default=False),
+        # Sorted, so that the settings of pages with the same modes are equal (see parse_page_settings)
+        disabled_replace_modes=sorted(set(get_list(data, "disabled_replace_modes", str, default=[]))),
         dynamic_prefix=get_string(data, "dynamic_prefix", "d"),
         dynamic_suffix=get_string(data, "dynamic_suffix", "d"),
         editable_prefix=get_string(data, "editable_prefix", "e"),
@@ -122,22 +143,51 @@ def parse_settings(data: dict, location: str) -> PlaceholderSettings:
     if len(set(patterns)) != len(patterns):
         raise PlaceholderConfigError(f"Multiple different replacement methods search for the same pattern. The patterns are: {', '.join(patterns)}")
 
+    assert_valid_replace_modes(settings.disabled_replace_modes)
     return settings
 
 
+@add_problematic_data_to_exceptions
+def parse_page_settings(data: dict, location: str, settings: PlaceholderSettings) -> PlaceholderSettings:
+    """
+    Applies the settings from a page's front matter to the global settings.
+    Pages can only turn features off, since the JavaScript code and the Markdown extension are set up for the whole site
+    """
+    assert_no_unknown_fields(data, PAGE_SETTINGS_FIELD_NAMES)
+
+    disabled_replace_modes = get_list(data, "disabled_replace_modes", str, default=[])
+    assert_valid_replace_modes(disabled_replace_modes)
+
+    return settings._replace(
+        auto_placeholder_tables=settings.auto_placeholder_tables and get_bool(data, "auto_placeholder_tables", default=True),
+        create_no_js_fallback=settings.create_no_js_fallback and get_bool(data, "create_no_js_fallback", default=True),
+        # Sorted, so that pages with the same settings can share a PageProcessor
+        disabled_replace_modes=sorted(set(settings.disabled_replace_modes) | set(disabled_replace_modes)),
+    )
+
+
+def assert_valid_replace_modes(replace_modes: list[str]) -> None:
+    for mode in replace_modes:
+        if mode not in REPLACE_MODES:
+            raise PlaceholderConfigError(f"Unknown replace mode '{mode}'. The allowed values are: {', '.join(REPLACE_MODES)}")
+
+
 def parse_configuration_file(path: str) -> PlaceholderConfig:
     """
     Load placeholder data from a file and run some checks on the parsed contents
     """
     if os.path.exists(path):
         with open(path, "rb") as f:
-            data = yaml.safe_load(f)
-
-        return parse_configuration(data, path)        
+            return parse_configuration_bytes(f.read(), path)
     else:
         raise PlaceholderConfigError(f"Configuration file '{path}' does not exist")
 
 
+def parse_configuration_bytes(contents: bytes, location: str) -> PlaceholderConfig:
+    data = yaml.load(contents, Loader=YAML_LOADER)
+    return parse_configuration(data, location)
+
+
 @add_problematic_data_to_exceptions
 def parse_configuration(data: dict, location: str) -> PlaceholderConfig:
     assert_no_unknown_fields(data, CONFIGURATION_FIELD_NAMES)
@@ -150,16 +200,32 @@ def parse_configuration(data: dict, location: str) -> PlaceholderConfig:
 
     placeholder_data = get_dict(data, "placeholders")
     placeholders = parse_placeholders(placeholder_data, f"{location}.placeholders", merged_validators)
+    assert_no_baked_dependencies(placeholders)
 
     config = PlaceholderConfig(
         placeholders=placeholders,
         settings=settings,
         validators=merged_validators,
+        nested_placeholders={},
+        expanded_default_values={},
     )
 
     # Only once everything has been parsed can be check for cyclic dependencies in placeholders.
     # This will throw an error if cycles exist
     from .cyclic_dependency_detector import DependencyGraph
-    DependencyGraph(config, f"{location} (dependency graph)").ensure_no_cycles_exist()
+    from .default_values import expand_default_values
+    dependency_graph = DependencyGraph(config, f"{location} (dependency graph)")
+    dependency_graph.ensure_no_cycles_exist()
+
+    return config._replace(
+        nested_placeholders=dependency_graph.get_nested_placeholders(),
+        expanded_default_values=expand_default_values(config, dependency_graph.get_topological_order()),
+    )
+
 
-    return config
+def assert_no_baked_dependencies(placeholders: dict[str,Placeholder]) -> None:
+    # The values of computed placeholders are calculated by the JavaScript code, which does not know about baked placeholders
+    for placeholder in placeholders.values():
+        for dependency in placeholder.computed_depends_on:
+            if placeholders[dependency].bake:
+                raise PlaceholderConfigError(f"Computed placeholder '{placeholder.name}' depends on '{dependency}', which has 'bake' enabled")
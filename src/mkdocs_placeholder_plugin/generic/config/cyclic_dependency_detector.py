@@ -1,86 +1,260 @@
-import re
+from collections.abc import Mapping
+from typing import Iterable, Iterator, Optional
 # local
+from ..token_regex import get_token_match, is_start_of_other_name
 from .parser_utils import PlaceholderConfigErrorWithData
 from .configuration import PlaceholderConfig
+from .default_values import compile_nested_placeholder_regex, get_nested_placeholder_affixes
 from .placeholder import InputType, Placeholder
 
 
-def build_regexes(config: PlaceholderConfig) -> dict[str, re.Pattern]:
+class NestedPlaceholderFinder:
     """
-    Returns a map of all placeholder names to regexes that match the placeholder using any replace mode (matches xNAMEx, sNAMEs, etc)
+    Finds the placeholders that are referenced in a default value using any replace mode (xNAMEx, sNAMEs, etc).
+    A single regex captures the name, so the costs of a search do not depend on the number of placeholders
     """
-    s = config.settings
-    prefix_options = [s.dynamic_prefix, s.editable_prefix, s.html_prefix, s.normal_prefix, s.static_prefix]
-    suffix_options = [s.dynamic_suffix, s.editable_suffix, s.html_suffix, s.normal_suffix, s.static_suffix]
-    prefix_string = "[" + "|".join([re.escape(x) for x in prefix_options]) + "]"
-    suffix_string = "[" + "|".join([re.escape(x) for x in suffix_options]) + "]"
+    def __init__(self, config: PlaceholderConfig) -> None:
+        self.token_regex = compile_nested_placeholder_regex(config)
+        # The regex prefers longer names, so xNAMEx would not be found in xNAMExOTHERx if NAMExOTHER exists. These rare cases are checked separately
+        names = sorted(config.placeholders)
+        self.shadowed_patterns: list[tuple[str,str]] = [(name, prefix + name + suffix)
+                                                        for prefix, suffix in get_nested_placeholder_affixes(config) for name in names
+                                                        if is_start_of_other_name(name, name + suffix, names)]
 
-    # Technically this also matches mismatched placeholders like sNAMEx, but I don't think it should cause problems
-    return {name: re.compile(prefix_string + re.escape(name) + suffix_string)
-            for name in config.placeholders.keys()}
+    def find_nested_placeholders(self, text: str) -> set[str]:
+        referenced = set()
+        search_start_pos = 0
+        while match := self.token_regex.search(text, search_start_pos):
+            referenced.add(get_token_match(match)[1])
+            # Matches may overlap (for example xAxBx), so we continue directly after the start of the match
+            search_start_pos = match.start() + 1
+
+        for name, pattern in self.shadowed_patterns:
+            if name not in referenced and pattern in text:
+                referenced.add(name)
+        return referenced
 
 
-def get_direct_dependencies(placeholder: Placeholder, placeholder_regexes: dict[str, re.Pattern]) -> set[str]:
+def get_direct_dependencies(placeholder: Placeholder, finder: Optional[NestedPlaceholderFinder]) -> set[str]:
     # Computed placeholders: add explicit depends_on
     if placeholder.input_type == InputType.Computed:
         return set(placeholder.computed_depends_on)
 
     # allow_nested: treat placeholders referenced in default_value as dependencies
     if placeholder.allow_nested and placeholder.default_value:
-        # Find all placeholder names referenced in default_value (e.g., xNAMEx)
-        referenced = set()
-        for match_name, match_regex in placeholder_regexes.items():
-            if match_regex.search(placeholder.default_value):
-                referenced.add(match_name)
-        return referenced
+        if finder is None:
+            raise Exception("[Internal error] A NestedPlaceholderFinder is needed to determine the dependencies of nested placeholders")
+        return finder.find_nested_placeholders(placeholder.default_value)
 
     # Normal placeholders have no dependencies
     return set()
 
 
 class DependencyGraph:
-    def __init__(self, config: PlaceholderConfig, location: str):
+    def __init__(self, config: PlaceholderConfig, location: str, known_dependencies: Optional[dict[str,set[str]]] = None):
+        """
+        `known_dependencies` can contain the direct dependencies of placeholders, that did not change since they were last determined.
+        Only the dependencies of the other placeholders are searched for
+        """
         self.placeholders = config.placeholders
-        placeholder_regexes: dict[str, re.Pattern] = build_regexes(config)
-        self.dep_graph: dict[str, set[str]] = {name: get_direct_dependencies(placeholder, placeholder_regexes) for name, placeholder in self.placeholders.items()}
+        known_dependencies = known_dependencies or {}
+        finder = None
+        if any(name not in known_dependencies for name in self.placeholders):
+            finder = NestedPlaceholderFinder(config)
+        self.dep_graph: dict[str, set[str]] = {
+            name: known_dependencies[name] if name in known_dependencies else get_direct_dependencies(placeholder, finder)
+            for name, placeholder in self.placeholders.items()
+        }
         self.location = location
 
-    def ensure_no_cycles_exist(self):
-        visited: set[str] = set()
-        for name in self.placeholders:
-            if name in self.dep_graph[name]:
-                raise PlaceholderConfigErrorWithData(
-                    f"Placeholder {name} depends on itself",
-                    self.location,
-                    # Return a list of all involved placeholders and what they depend on
-                    {"name": name, "default_value": self.placeholders[name].default_value, "allow_nested": self.placeholders[name].allow_nested}
-                )
-
-            if name not in visited:
-                self._dfs(name, [name], visited, set())
-
-    # Vibe coded with Copilot
-    def _dfs(self, node: str, stack: list[str], visited: set[str], rec_stack: set[str]):
+    def ensure_no_cycles_exist(self, roots: Optional[Iterable[str]] = None):
+        """
+        Raises an error, if a cycle is reachable from the given placeholders (by default all placeholders).
+        All cycles are reported at once, so that they can be fixed without rebuilding after each fix
         """
-        Do a depth first search and return a cycle if it was found
+        problems: list[str] = []
+        involved: dict[str,list[str]] = {}
+        for component in self._find_strongly_connected_components(self.placeholders if roots is None else roots):
+            if len(component) == 1:
+                name = component[0]
+                if name not in self.dep_graph[name]:
+                    # Just a normal placeholder, that is not part of a cycle
+                    continue
+                problems.append(f"Placeholder {name} depends on itself")
+                cycle_path = [name]
+            else:
+                cycle_path = self._find_cycle_path(component)
+                problems.append(f"Dependency cycle detected among placeholders: {' -> '.join(cycle_path)}")
+            for x in cycle_path:
+                involved[x] = sorted(self.dep_graph[x])
+
+        if problems:
+            message = problems[0] if len(problems) == 1 else f"Found {len(problems)} dependency cycles:\n" + "\n".join(f"- {x}" for x in problems)
+            # Return a list of all involved placeholders and what they depend on
+            raise PlaceholderConfigErrorWithData(message, self.location, involved)
+
+    def get_nested_placeholders(self) -> "NestedPlaceholders":
         """
-        visited.add(node)
-        rec_stack.add(node)
-        for neighbor in self.dep_graph[node]:
-            if neighbor not in self.placeholders:
-                continue  # skip unknowns, already validated elsewhere
-            if neighbor not in visited:
-                if self._dfs(neighbor, stack + [neighbor], visited, rec_stack):
-                    return True
-            elif neighbor in rec_stack:
-                # Cycle detected
-                cycle_path = stack + [neighbor]
-
-                raise PlaceholderConfigErrorWithData(
-                    f"Dependency cycle detected among placeholders: {' -> '.join(cycle_path)}",
-                    self.location,
-                    # Return a list of all involved placeholders and what they depend on
-                    {x: list(self.dep_graph[x]) for x in cycle_path}
-                )
-        rec_stack.remove(node)
-        return False
+        Returns the names of all placeholders each placeholder directly or indirectly depends on.
+        Only call this after ensure_no_cycles_exist, since it expects the graph to be acyclic.
+        """
+        return NestedPlaceholders(self.dep_graph)
+
+    def get_dependents(self, names: Iterable[str]) -> set[str]:
+        """
+        Returns the given names and the names of all placeholders, that directly or indirectly depend on them
+        """
+        dependents: dict[str,list[str]] = {}
+        for name, children in self.dep_graph.items():
+            for child in children:
+                dependents.setdefault(child, []).append(name)
+
+        reached = set(names)
+        queue = list(reached)
+        for node in queue:
+            for parent in dependents.get(node, []):
+                if parent not in reached:
+                    reached.add(parent)
+                    queue.append(parent)
+        return reached
+
+    def get_topological_order(self, done: Optional[set[str]] = None) -> list[str]:
+        """
+        Returns all placeholder names (except the ones in `done`) ordered so, that each placeholder comes after all placeholders it depends on.
+        Only call this after ensure_no_cycles_exist, since it expects the graph to be acyclic.
+        """
+        order: list[str] = []
+        done = set(done or ())
+        for root in self.placeholders:
+            # Iterative post order traversal, so that long dependency chains do not hit the recursion limit
+            stack = [root]
+            while stack:
+                node = stack[-1]
+                if node in done:
+                    stack.pop()
+                    continue
+
+                # Sorted, so that the order does not depend on the iteration order of the set
+                missing = [x for x in sorted(self.dep_graph[node]) if x in self.placeholders and x not in done]
+                if missing:
+                    stack += missing
+                else:
+                    stack.pop()
+                    done.add(node)
+                    order.append(node)
+        return order
+
+    def _get_children(self, node: str) -> list[str]:
+        # Sorted, so that the reported cycles do not depend on the iteration order of the set
+        return [x for x in sorted(self.dep_graph[node]) if x in self.placeholders] # skip unknowns, already validated elsewhere
+
+    def _find_strongly_connected_components(self, roots: Iterable[str]) -> list[list[str]]:
+        """
+        Returns the strongly connected components, that are reachable from the given placeholders.
+        Iterative version of Tarjan's algorithm, so that long dependency chains do not hit the recursion limit
+        """
+        index: dict[str,int] = {}
+        lowlink: dict[str,int] = {}
+        component_stack: list[str] = []
+        on_component_stack: set[str] = set()
+        components: list[list[str]] = []
+        for root in roots:
+            if root in index:
+                continue
+
+            index[root] = lowlink[root] = len(index)
+            component_stack.append(root)
+            on_component_stack.add(root)
+            # Each entry contains a node and the iterator over the children that were not visited yet
+            work_stack = [(root, iter(self._get_children(root)))]
+            while work_stack:
+                node, children = work_stack[-1]
+                for child in children:
+                    if child not in index:
+                        index[child] = lowlink[child] = len(index)
+                        component_stack.append(child)
+                        on_component_stack.add(child)
+                        work_stack.append((child, iter(self._get_children(child))))
+                        break
+                    elif child in on_component_stack:
+                        lowlink[node] = min(lowlink[node], index[child])
+                else:
+                    # All children are done
+                    work_stack.pop()
+                    if work_stack:
+                        parent = work_stack[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                    if lowlink[node] == index[node]:
+                        # The node is the root of a component, which contains all nodes above it on the stack
+                        component = []
+                        while True:
+                            member = component_stack.pop()
+                            on_component_stack.remove(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        components.append(component)
+        return components
+
+    def _find_cycle_path(self, component: list[str]) -> list[str]:
+        """
+        Returns the shortest cycle through the alphabetically first placeholder of the strongly connected component (like ['A', 'B', 'A'])
+        """
+        members = set(component)
+        start = min(component)
+        # Breadth first search, that stores the node each node was reached from
+        reached_from: dict[str,str] = {}
+        queue = [start]
+        for node in queue:
+            for child in self._get_children(node):
+                if child == start:
+                    path = [node]
+                    while path[-1] != start:
+                        path.append(reached_from[path[-1]])
+                    return path[::-1] + [start]
+                if child in members and child not in reached_from:
+                    reached_from[child] = node
+                    queue.append(child)
+        raise Exception(f"[Internal error] No cycle found in strongly connected component {component}")
+
+
+class NestedPlaceholders(Mapping[str,frozenset[str]]):
+    """
+    Placeholder name -> names of all placeholders it (directly or indirectly) depends on.
+    Only the direct dependencies are stored. Storing the transitive closure of every placeholder would need O(n^2) memory for long chains,
+    so it is computed when it is first requested and only remembered for the requested placeholders.
+    """
+    def __init__(self, dependencies: dict[str,set[str]]) -> None:
+        self.dependencies = dependencies
+        self.closures: dict[str,frozenset[str]] = {}
+
+    def __getitem__(self, name: str) -> frozenset[str]:
+        closure = self.closures.get(name)
+        if closure is None:
+            if name not in self.dependencies:
+                raise KeyError(name)
+            reachable: set[str] = set()
+            stack = [name]
+            while stack:
+                for child in self.dependencies[stack.pop()]:
+                    # Unknown names are reported elsewhere
+                    if child not in reachable and child in self.dependencies:
+                        reachable.add(child)
+                        stack.append(child)
+            closure = self.closures[name] = frozenset(reachable)
+        return closure
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.dependencies)
+
+    def __len__(self) -> int:
+        return len(self.dependencies)
+
+    def __getstate__(self) -> dict:
+        # The closures can be computed again, so they are not stored in the config snapshots
+        return {"dependencies": self.dependencies}
+
+    def __setstate__(self, state: dict) -> None:
+        self.dependencies = state["dependencies"]
+        self.closures = {}
@@ -0,0 +1,89 @@
+import re
+from typing import Optional
+# local
+from .. import PlaceholderConfigError
+from ..token_regex import compile_token_regex, get_token_match
+from .configuration import PlaceholderConfig
+from .computed_template import evaluate_template
+from .placeholder import InputType, Placeholder
+
+# Shown instead of values, that are only known when the JavaScript code runs
+JAVASCRIPT_FUNCTION_VALUE = "<JAVASCRIPT_FUNCTION>"
+
+
+def get_default_value(placeholder: Placeholder) -> str:
+    """
+    Returns the default value of the placeholder, without expanding any nested placeholders
+    """
+    if placeholder.default_function:
+        return JAVASCRIPT_FUNCTION_VALUE
+    elif placeholder.values:
+        return placeholder.values[placeholder.default_value]
+    else:
+        return placeholder.default_value
+
+
+def get_nested_placeholder_affixes(config: PlaceholderConfig) -> list[tuple[str,str]]:
+    """
+    Returns the (prefix, suffix) pairs of all replace modes, which can be used to reference nested placeholders
+    """
+    s = config.settings
+    return [
+        (s.editable_prefix, s.editable_suffix),
+        (s.dynamic_prefix, s.dynamic_suffix),
+        (s.html_prefix, s.html_suffix),
+        (s.normal_prefix, s.normal_suffix),
+        (s.static_prefix, s.static_suffix),
+    ]
+
+
+def compile_nested_placeholder_regex(config: PlaceholderConfig) -> re.Pattern:
+    """
+    Compiles a regex that matches any placeholder using any replace mode (xNAMEx, sNAMEs, etc).
+    The dependency graph uses the same pattern, so Python's regex cache only needs to compile it once per config
+    """
+    return compile_token_regex(get_nested_placeholder_affixes(config), sorted(config.placeholders))
+
+
+def expand_default_values(config: PlaceholderConfig, topological_order: list[str], known_values: Optional[dict[str,str]] = None) -> dict[str,str]:
+    """
+    Returns the default values of all placeholders. If a placeholder allows nested placeholders, they are replaced with their (expanded) default values.
+    The placeholders are expanded in topological order, so the values of all nested placeholders are already known and each value is only scanned once.
+    `known_values` can contain the expanded values of placeholders, that (including their nested placeholders) did not change.
+
+    This works similar to safe_replace_multiple_placeholders_in_string in replacer.ts:
+    Since all placeholders are replaced in a single pass, placeholders that are in a previously replaced placeholder's value are not replaced
+    """
+    token_regex = compile_nested_placeholder_regex(config)
+
+    expanded: dict[str,str] = dict(known_values or {})
+    for name in topological_order:
+        _expand_default_value(name, config, token_regex, expanded, [])
+    return expanded
+
+
+def _expand_default_value(name: str, config: PlaceholderConfig, token_regex: re.Pattern, expanded: dict[str,str], in_progress: list[str]) -> str:
+    value = expanded.get(name)
+    if value is None:
+        placeholder = config.placeholders[name]
+        value = get_default_value(placeholder)
+        if placeholder.input_type == InputType.Computed and not placeholder.computed_function:
+            # Templates can already be evaluated now. Like in the JavaScript code, they get the unexpanded values of normal placeholders
+            values = {}
+            for dependency in placeholder.computed_depends_on:
+                dependency_placeholder = config.placeholders[dependency]
+                if dependency_placeholder.input_type == InputType.Computed:
+                    values[dependency] = _expand_default_value(dependency, config, token_regex, expanded, in_progress)
+                else:
+                    values[dependency] = get_default_value(dependency_placeholder)
+            value = evaluate_template(placeholder.computed_template, values)
+        elif placeholder.allow_nested and not placeholder.default_function:
+            if name in in_progress:
+                raise PlaceholderConfigError(f"Dependency cycle detected among placeholders: {' -> '.join(in_progress + [name])}")
+
+            # The nested values should already be known. They are only expanded here, if the dependency graph does not know about them
+            in_progress.append(name)
+            value = token_regex.sub(lambda match: _expand_default_value(get_token_match(match)[1], config, token_regex, expanded, in_progress), value)
+            in_progress.pop()
+        expanded[name] = value
+    return value
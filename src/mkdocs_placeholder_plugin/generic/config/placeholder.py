@@ -1,9 +1,10 @@
 from enum import Enum, auto
 import re
-from typing import NamedTuple, Any
+from typing import Collection, NamedTuple, Any, Optional
 # local
 from .. import warning, PlaceholderConfigError
 from .validator import Validator
+from .computed_template import TemplatePart, parse_template, get_template_placeholder_names
 from ..validators import assert_matches_one_validator, VALIDATOR_PRESETS
 from .parser_utils import assert_no_unknown_fields, add_problematic_data_to_exceptions, get_bool, get_string
 
@@ -18,6 +19,7 @@ TYPES_PRIMITIVE = [bool, float, int, str]
 # Only these fields are allowed in placeholders
 PLACEHOLDER_FIELD_NAMES = {
     "allow_nested",
+    "bake",
     "computed",
     "default",
     "default-function",
@@ -31,6 +33,7 @@ PLACEHOLDER_FIELD_NAMES = {
 COMPUTED_FIELD_NAMES = {
     "depends_on",
     "function",
+    "template",
 }
 
 
@@ -70,12 +73,21 @@ class Placeholder(NamedTuple):
     computed_depends_on: list[str]
     # For computed placeholders: JavaScript function body that receives dependency values as named arguments
     computed_function: str
+    # For computed placeholders: The parsed template, that is used instead of computed_function. It can also be evaluated when the site is built
+    computed_template: list[TemplatePart]
+    # Whether the (expanded) default value should be inserted when the site is built instead of in the browser.
+    # Baked placeholders are not passed to the JavaScript code, so they can not be changed by users
+    bake: bool
 
 
 @add_problematic_data_to_exceptions
-def parse_placeholders(data: dict, location: str, validators: dict[str,Validator]) -> dict[str,Placeholder]:
+def parse_placeholders(data: dict, location: str, validators: dict[str,Validator], all_placeholder_names: Optional[Collection[str]] = None) -> dict[str,Placeholder]:
+    """
+    Parses the placeholders in `data`. If they are only a part of the config, `all_placeholder_names` needs to contain the names of all placeholders
+    """
     placeholders: dict[str,Placeholder] = {}
-    all_placeholder_names = data.keys()
+    if all_placeholder_names is None:
+        all_placeholder_names = data.keys()
 
     if type(data) != dict:
         raise PlaceholderConfigError(f"[placeholder] Config file error: Expected root element of type 'dict', but got '{type(data).__name__}'")
@@ -107,7 +119,7 @@ def parse_placeholders(data: dict, location: str, validators: dict[str,Validator
 
 
 @add_problematic_data_to_exceptions
-def parse_placeholder_dict(data: dict[str,Any], location: str, name: str, validators: dict[str,Validator], all_placeholder_names: list[str]) -> Placeholder:
+def parse_placeholder_dict(data: dict[str,Any], location: str, name: str, validators: dict[str,Validator], all_placeholder_names: Collection[str]) -> Placeholder:
     """
     Parse a dictionary that contains the information for a single placeholder.
     """
@@ -138,6 +150,10 @@ def parse_placeholder_dict(data: dict[str,Any], location: str, name: str, valida
     default_allow_nested = input_type == InputType.Checkbox or input_type == InputType.Dropdown or read_only
     allow_nested = get_bool(data, "allow_nested", default_allow_nested)
 
+    bake = get_bool(data, "bake", False)
+    if bake and default_function:
+        raise PlaceholderConfigError("Field 'bake' cannot be used together with 'default-function', since the value is only known in the browser")
+
     return Placeholder(
         allow_nested=allow_nested,
         name=name,
@@ -151,13 +167,15 @@ def parse_placeholder_dict(data: dict[str,Any], location: str, name: str, valida
         validator_list=validator_list,
         computed_depends_on=[],
         computed_function="",
+        computed_template=[],
+        bake=bake,
     )
 
 
 def parse_computed_placeholder(data: dict[str,Any], computed_data: Any, location: str, name: str,
-                                read_only: bool, replace_everywhere: bool, description: str, all_placeholder_names: list[str]) -> Placeholder:
+                                read_only: bool, replace_everywhere: bool, description: str, all_placeholder_names: Collection[str]) -> Placeholder:
     """
-    Parse a computed placeholder — one whose value is derived from other placeholders via a JS function.
+    Parse a computed placeholder — one whose value is derived from other placeholders via a JS function or a template.
     """
     if type(computed_data) != dict:
         raise PlaceholderConfigError(f"Field 'computed': Expected a dict, got '{type(computed_data).__name__}'")
@@ -165,14 +183,29 @@ def parse_computed_placeholder(data: dict[str,Any], computed_data: Any, location
     assert_no_unknown_fields(computed_data, COMPUTED_FIELD_NAMES)
 
     # Disallow fields that don't make sense for computed placeholders
-    for forbidden in ("default", "default-function", "values", "validators"):
+    for forbidden in ("bake", "default", "default-function", "values", "validators"):
         if forbidden in data:
             raise PlaceholderConfigError(f"Field '{forbidden}' cannot be used together with 'computed'")
 
+    # Parse the function body or the template
+    computed_function = ""
+    computed_template: list[TemplatePart] = []
+    uses_template = "template" in computed_data
+    if uses_template:
+        if "function" in computed_data:
+            raise PlaceholderConfigError("Fields 'computed.function' and 'computed.template' are mutually exclusive")
+        computed_template = parse_template(get_string(computed_data, "template"))
+    else:
+        computed_function = get_string(computed_data, "function", allow_empty_string=False)
+    template_names = get_template_placeholder_names(computed_template)
+
     # Parse depends_on — accepts a single name string or a list of names
     raw_depends_on = computed_data.get("depends_on")
     if raw_depends_on is None:
-        raise PlaceholderConfigError("Field 'computed.depends_on' is required. If the placeholder does not depend on any inputs use 'false' or '[]'")
+        if not uses_template:
+            raise PlaceholderConfigError("Field 'computed.depends_on' is required. If the placeholder does not depend on any inputs use 'false' or '[]'")
+        # Templates already tell us, which placeholders they use
+        depends_on = template_names
     elif raw_depends_on == False:
         depends_on = []
     elif isinstance(raw_depends_on, str):
@@ -193,8 +226,9 @@ def parse_computed_placeholder(data: dict[str,Any], computed_data: Any, location
         if dependency == name:
             raise PlaceholderConfigError(f"Computed placeholder '{name}': depends_on references itself")
 
-    # Parse the function body
-    computed_function = get_string(computed_data, "function", allow_empty_string=False)
+    for template_name in template_names:
+        if template_name not in depends_on:
+            raise PlaceholderConfigError(f"Computed placeholder '{name}': template uses placeholder '{template_name}', which is not in depends_on")
 
     # computed placeholders are implicitly read_only
     effective_read_only = True
@@ -214,6 +248,8 @@ def parse_computed_placeholder(data: dict[str,Any], computed_data: Any, location
         validator_list=[],
         computed_depends_on=depends_on,
         computed_function=computed_function,
+        computed_template=computed_template,
+        bake=False,
     )
 
 
@@ -1,4 +1,5 @@
-from typing import Any
+import re
+from typing import Any, Optional
 # local
 from .. import PlaceholderConfigError
 from .parser_utils import assert_no_unknown_fields, add_problematic_data_to_exceptions, get_bool, get_string, get_list
@@ -68,12 +69,17 @@ def parse_validator_rule(data: dict[str,Any], location: str) -> ValidatorRule:
         raise PlaceholderConfigError(f"Unknown severity '{severity}'. Should be one of {', '.join(SEVERITY_LIST)}")
 
     regex = ""
+    compiled_regex: Optional[re.Pattern] = None
     match_function = ""
     if "regex" in data:
         if "match_function" in data:
             raise PlaceholderConfigError("Keys 'regex' and 'match_function' are mutually exclusive, but both are defined")
         else:
             regex = get_string(data, "regex", allow_empty_string=False)
+            try:
+                compiled_regex = re.compile(regex)
+            except re.error as ex:
+                raise PlaceholderConfigError(f"Invalid regular expression '{regex}': {ex}")
     else:
         if "match_function" in data:
             match_function = get_string(data, "match_function", allow_empty_string=False)
@@ -94,6 +100,7 @@ def parse_validator_rule(data: dict[str,Any], location: str) -> ValidatorRule:
     return ValidatorRule(
         severity=severity,
         regex_string=regex,
+        regex=compiled_regex,
         match_function=match_function,
         should_match=should_match,
         error_message=error_message,
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+from typing import Any, NamedTuple, Optional
+# pip packages
+import yaml
+# local
+from . import debug, warning, record_warnings, PlaceholderConfigError
+from .config import Placeholder, PlaceholderConfig
+from .config.configuration import YAML_LOADER, CONFIGURATION_FIELD_NAMES, parse_settings, assert_no_baked_dependencies
+from .config.cyclic_dependency_detector import DependencyGraph
+from .config.default_values import expand_default_values
+from .config.parser_utils import assert_no_unknown_fields, get_dict
+from .config.placeholder import parse_placeholders
+from .config.validator import parse_validators
+from .config_snapshot import load_snapshot, store_snapshot
+from .page_cache import get_code_version
+
+
+class CatalogFragment(NamedTuple):
+    """
+    A single file of a placeholder catalog
+    """
+    # Hash of the file's contents
+    file_hash: str
+    # The parsed YAML data
+    data: dict
+    # The parsed placeholders depend on the validators (and for computed placeholders the names of all placeholders). This is a hash of them
+    context_key: str
+    placeholders: dict[str,Placeholder]
+    # Warnings that were shown while parsing the placeholders. They are shown again, when the placeholders are reused
+    warnings: list[str]
+
+
+class CatalogState(NamedTuple):
+    # File path -> fragment
+    fragments: dict[str,CatalogFragment]
+    config: PlaceholderConfig
+    # The direct dependencies of each placeholder (see DependencyGraph)
+    dependencies: dict[str,set[str]]
+    # Hash of the validator definitions
+    validators_key: str
+
+
+# Location -> the state after the catalog was last parsed.
+# The module stays loaded between the rebuilds of `mkdocs serve`, so only the modified files need to be parsed again
+_CATALOGS: dict[str,CatalogState] = {}
+
+
+def parse_configuration_catalog(paths: list[str], location: str, snapshot_dir: Optional[str] = None) -> PlaceholderConfig:
+    """
+    Parses multiple placeholder files and merges them into a single config. Each placeholder, validator, and setting may only be defined once.
+    Only the files that were modified since the catalog was last parsed are parsed again.
+    The state is kept in memory and, if `snapshot_dir` is set, also stored on disk for the next process.
+    """
+    if not paths:
+        raise PlaceholderConfigError(f"{location}: The placeholder catalog does not contain any files")
+
+    snapshot_path = None
+    if snapshot_dir:
+        key = hashlib.sha256("\0".join([get_code_version(), location]).encode()).hexdigest()
+        snapshot_path = os.path.join(snapshot_dir, f"catalog-{key}.pickle")
+
+    previous = _CATALOGS.get(location)
+    if previous is None and snapshot_path:
+        previous = load_snapshot(snapshot_path, CatalogState)
+
+    state = _update_catalog(paths, location, previous)
+    _CATALOGS[location] = state
+    if snapshot_path:
+        store_snapshot(snapshot_path, state)
+    return state.config
+
+
+def _hash_data(data: Any) -> str:
+    # Sorted keys, so that the hash does not depend on the order of the files
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _update_catalog(paths: list[str], location: str, previous: Optional[CatalogState]) -> CatalogState:
+    previous_fragments = previous.fragments if previous else {}
+
+    file_contents: dict[str,bytes] = {}
+    for path in paths:
+        with open(path, "rb") as f:
+            file_contents[path] = f.read()
+    file_hashes = {path: hashlib.sha256(contents).hexdigest() for path, contents in file_contents.items()}
+
+    # Only load the YAML of modified files
+    file_data: dict[str,Any] = {path: previous_fragments[path].data for path in paths if path in previous_fragments and previous_fragments[path].file_hash == file_hashes[path]}
+    modified_paths = [path for path in paths if path not in file_data]
+    for path in modified_paths:
+        file_data[path] = yaml.load(file_contents[path], Loader=YAML_LOADER)
+    debug(f"Placeholder catalog '{location}': Loaded {len(modified_paths)} of {len(paths)} files")
+
+    # Merge the data of all files
+    settings_data: dict = {}
+    validator_data: dict = {}
+    placeholder_data: dict[str,dict] = {}
+    defined_in: dict[str,str] = {}
+    for path in paths:
+        data = file_data[path]
+        if data is None:
+            # Empty file
+            data = {}
+        elif type(data) != dict:
+            raise PlaceholderConfigError(f"{path}: Expected root element of type 'dict', but got '{type(data).__name__}'")
+        assert_no_unknown_fields(data, CONFIGURATION_FIELD_NAMES)
+        file_data[path] = data
+
+        for section, merged in [("settings", settings_data), ("validators", validator_data)]:
+            for key, value in get_dict(data, section, default={}).items():
+                if key in merged:
+                    raise PlaceholderConfigError(f"{section} '{key}' is defined in both '{defined_in[f'{section}:{key}']}' and '{path}'")
+                merged[key] = value
+                defined_in[f"{section}:{key}"] = path
+
+        placeholder_data[path] = get_dict(data, "placeholders", default={})
+        for name in placeholder_data[path]:
+            if f"placeholder:{name}" in defined_in:
+                raise PlaceholderConfigError(f"Placeholder '{name}' is defined in both '{defined_in[f'placeholder:{name}']}' and '{path}'")
+            defined_in[f"placeholder:{name}"] = path
+
+    settings = parse_settings(settings_data, f"{location}.settings")
+    validators_key = _hash_data(validator_data)
+    if previous and previous.validators_key == validators_key:
+        # The reused placeholders reference these validator objects
+        validators = previous.config.validators
+    else:
+        validators = parse_validators(validator_data, f"{location}.validators")
+    all_names = [name for path in paths for name in placeholder_data[path]]
+    names_key = _hash_data(sorted(all_names))
+
+    # Only parse the placeholders of files, that changed (or whose validators or referenced placeholders changed)
+    fragments: dict[str,CatalogFragment] = {}
+    placeholders: dict[str,Placeholder] = {}
+    changed_names: set[str] = set()
+    for path in paths:
+        has_computed = any(isinstance(value, dict) and "computed" in value for value in placeholder_data[path].values())
+        context_key = validators_key + (names_key if has_computed else "")
+        fragment = previous_fragments.get(path)
+        if fragment and fragment.file_hash == file_hashes[path] and fragment.context_key == context_key:
+            for message in fragment.warnings:
+                warning(message)
+        else:
+            with record_warnings() as warnings:
+                fragment_placeholders = parse_placeholders(placeholder_data[path], f"{path}.placeholders", validators, all_names)
+            fragment = CatalogFragment(file_hashes[path], file_data[path], context_key, fragment_placeholders, warnings)
+            changed_names.update(fragment_placeholders)
+        fragments[path] = fragment
+        placeholders.update(fragment.placeholders)
+
+    assert_no_baked_dependencies(placeholders)
+    # Parsing the placeholders marks their validators as used. Since not all placeholders were parsed again, the flags are updated here
+    for validator in validators.values():
+        validator.mark_unused()
+    for placeholder in placeholders.values():
+        for validator in placeholder.validator_list:
+            validator.mark_used()
+
+    config = PlaceholderConfig(
+        placeholders=placeholders,
+        settings=settings,
+        validators=validators,
+        nested_placeholders={},
+        expanded_default_values={},
+    )
+
+    graph_location = f"{location} (dependency graph)"
+    if previous is None or previous.config.settings != settings:
+        # The settings determine, how nested placeholders are found. So everything needs to be checked again
+        dependency_graph = DependencyGraph(config, graph_location)
+        dependency_graph.ensure_no_cycles_exist()
+        config = config._replace(
+            nested_placeholders=dependency_graph.get_nested_placeholders(),
+            expanded_default_values=expand_default_values(config, dependency_graph.get_topological_order()),
+        )
+        return CatalogState(fragments, config, dependency_graph.dep_graph, validators_key)
+
+    # Only check the subgraph, that is affected by the changes
+    previous_config = previous.config
+    added_names = [name for name in placeholders if name not in previous_config.placeholders]
+    removed_names = [name for name in previous_config.placeholders if name not in placeholders]
+    changed_names.update(removed_names)
+    known_dependencies: dict[str,set[str]] = {}
+    for name, placeholder in placeholders.items():
+        if name in changed_names:
+            continue
+        if placeholder.allow_nested and any(other_name in placeholder.default_value for other_name in added_names + removed_names):
+            # May reference the new placeholders or have referenced the removed ones. Since a name can also overlap with other names
+            # (like NAME and NAMExOTHER), which placeholders are found depends on all names. So the dependencies need to be searched for again
+            changed_names.add(name)
+        else:
+            known_dependencies[name] = previous.dependencies[name]
+
+    dependency_graph = DependencyGraph(config, graph_location, known_dependencies)
+    # A new cycle would need to contain a changed placeholder
+    dependency_graph.ensure_no_cycles_exist([name for name in placeholders if name in changed_names])
+
+    # The unchanged placeholders have the same dependencies as before, so they only reach changed placeholders through changed placeholders
+    affected = dependency_graph.get_dependents(changed_names)
+    unaffected = {name for name in placeholders if name not in affected}
+    known_values = {name: previous_config.expanded_default_values[name] for name in unaffected}
+    topological_order = dependency_graph.get_topological_order(done=unaffected)
+    debug(f"Placeholder catalog '{location}': Updated the dependencies of {len(placeholders) - len(unaffected)} of {len(placeholders)} placeholders")
+    config = config._replace(
+        nested_placeholders=dependency_graph.get_nested_placeholders(),
+        expanded_default_values=expand_default_values(config, topological_order, known_values),
+    )
+    return CatalogState(fragments, config, dependency_graph.dep_graph, validators_key)
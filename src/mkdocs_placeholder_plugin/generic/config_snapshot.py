@@ -0,0 +1,107 @@
+import hashlib
+import os
+import pickle
+import stat
+from typing import Any, NamedTuple, Optional
+# local
+from . import debug, warning, record_warnings, PlaceholderConfigError
+from .config import PlaceholderConfig
+from .config.configuration import parse_configuration_bytes
+from .page_cache import get_code_version
+
+
+class ConfigSnapshot(NamedTuple):
+    config: PlaceholderConfig
+    # Warnings that were shown while parsing the file. They are shown again, when the snapshot is used
+    warnings: list[str]
+
+
+# File path -> (key, snapshot) of the last parsed version of the file.
+# The module stays loaded between the rebuilds of `mkdocs serve`, so unchanged files do not need to be parsed again
+_SNAPSHOTS: dict[str,tuple[str,ConfigSnapshot]] = {}
+
+
+def parse_configuration_file_with_snapshot(path: str, snapshot_dir: Optional[str] = None) -> PlaceholderConfig:
+    """
+    Like parse_configuration_file, but reuses the validated config if the file did not change since it was last parsed.
+    The snapshots are kept in memory and, if `snapshot_dir` is set, also stored on disk for the next process.
+    """
+    if not os.path.exists(path):
+        raise PlaceholderConfigError(f"Configuration file '{path}' does not exist")
+
+    with open(path, "rb") as f:
+        contents = f.read()
+    # The code may parse the same file differently after an update
+    key_data = "\0".join([get_code_version(), path, ""]).encode() + contents
+    key = hashlib.sha256(key_data).hexdigest()
+    snapshot_path = os.path.join(snapshot_dir, f"config-{key}.pickle") if snapshot_dir else None
+
+    snapshot: Optional[ConfigSnapshot] = None
+    if path in _SNAPSHOTS and _SNAPSHOTS[path][0] == key:
+        snapshot = _SNAPSHOTS[path][1]
+        debug(f"Using the in-memory snapshot of '{path}'")
+    elif snapshot_path:
+        snapshot = load_snapshot(snapshot_path, ConfigSnapshot)
+        if snapshot:
+            debug(f"Using the snapshot of '{path}' stored in '{snapshot_path}'")
+
+    if snapshot:
+        for message in snapshot.warnings:
+            warning(message)
+    else:
+        with record_warnings() as warnings:
+            config = parse_configuration_bytes(contents, path)
+        snapshot = ConfigSnapshot(config, warnings)
+        if snapshot_path:
+            store_snapshot(snapshot_path, snapshot)
+
+    _SNAPSHOTS[path] = (key, snapshot)
+    return snapshot.config
+
+
+def load_snapshot(snapshot_path: str, snapshot_type: type) -> Optional[Any]:
+    """
+    Returns the object stored in the file, if it exists and has the expected type.
+    Loading a pickled object can run arbitrary code, so only files that were written by the current user and that nobody else can modify are loaded.
+    Even then the snapshot directory must only be writable by users that you trust
+    """
+    try:
+        with open(snapshot_path, "rb") as f:
+            # Checks the opened file, so that it can not be swapped between the check and loading it
+            if not is_trusted_snapshot(os.fstat(f.fileno())):
+                warning(f"Ignoring config snapshot '{snapshot_path}', since it is not owned by the current user or can be modified by other users")
+                return None
+            snapshot = pickle.load(f)
+        # Update the modification time, so that the page cache does not evict it
+        os.utime(snapshot_path)
+        return snapshot if isinstance(snapshot, snapshot_type) else None
+    except Exception:
+        # Missing, deleted, or broken (for example by an interrupted build) snapshots are just recreated
+        return None
+
+
+def is_trusted_snapshot(file_stat: os.stat_result) -> bool:
+    if not hasattr(os, "getuid"):
+        # The owner can not be checked on Windows, so the snapshots stored on disk are not used there
+        return False
+    # Only the owner may write to it
+    return file_stat.st_uid == os.getuid() and not file_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def store_snapshot(snapshot_path: str, snapshot: Any) -> None:
+    if not hasattr(os, "getuid"):
+        # They would never be loaded (see is_trusted_snapshot)
+        return
+
+    # Write to a temporary file first, so that other processes never see partially written snapshots
+    temporary_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        # Only writable by the current user, independent of the umask. Otherwise load_snapshot would ignore it
+        fd = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, "wb") as f:
+            os.fchmod(fd, 0o600)
+            pickle.dump(snapshot, f)
+        os.replace(temporary_path, snapshot_path)
+    except OSError as ex:
+        warning(f"Failed to write config snapshot '{snapshot_path}': {ex}")
@@ -2,7 +2,11 @@ import re
 from typing import Optional
 # local
 from . import warning
-from .html_tag_parser import ParsedHtmlTag, parse_html_tag, create_html_opening_tag
+from .html_tag_parser import ParsedHtmlTag, parse_html_tag, scan_html_opening_tag, create_html_opening_tag
+from .line_index import LineIndex
+
+# How many '>' characters are tried as the end of a tag, that the fast scanner could not handle
+MAX_TAG_END_CANDIDATES = 10
 
 
 from typing import TypeVar
@@ -17,54 +21,81 @@ class HtmlTagHandler:
         self.add_line_in_warning = add_line_in_warning
         self.location = "Not yet initialized"
         self.full_text_string = ""
+        self.line_index = LineIndex("")
 
     def replace_function(self, old_value: str, parsed: ParsedHtmlTag) -> str:
         raise Exception("You need to subclass HtmlTagHandler and overwrite the 'replace_function' method")
 
     def process_string(self, file_name: str, file_contents: str) -> str:
         self.full_text_string = file_contents
+        self.line_index = LineIndex(file_contents)
         search_start_pos = 0
+        # The replacements are collected as (start, end, new_value) and applied once at the end.
+        # Rebuilding the string after every match would make this quadratic in the number of tags
+        edits: list[tuple[int,int,str]] = []
 
         # replace / handle all matches
         while match := self.start_regex.search(file_contents, search_start_pos):
-            file_contents, search_start_pos = self.handle_potential_occurence(file_name, file_contents, match)
+            search_start_pos = self.handle_potential_occurence(file_name, file_contents, match, edits)
 
-        return file_contents
+        return apply_edits(file_contents, edits)
 
-    def handle_potential_occurence(self, file_name: str, html: str, match: re.Match) -> tuple[str,int]:
+    def handle_potential_occurence(self, file_name: str, html: str, match: re.Match, edits: list[tuple[int,int,str]]) -> int:
+        """
+        Handles a single match of the start regex. Any replacement is added to `edits`.
+        Returns the position, where the search for the next match should start.
+        """
         start = match.span()[0]
-        # Determine where we are (for useful error messages)
-        if self.add_line_in_warning:
-            line_nr = html.count("\n", 0, start) + 1
-            self.location = f"{file_name}:{line_nr}"
-        else:
-            self.location = file_name
+        self.update_location(file_name, start)
 
         end_and_parsed = self.find_where_tag_ends(html, start)
         if end_and_parsed:
             end, parsed = end_and_parsed
             old_value = html[start:end]
 
-            if self.end_regex and not self.end_regex.match(html[end:]):
+            if self.end_regex and not self.end_regex.match(html, end):
                 # End pattern does not match, so we skip it
-                return (html, start + 1)
+                return start + 1
             else:
                 # Only process it if no end pattern exist or if it matches
                 # Give the replace_function the chance to replace the part of the string
                 new_value = self.replace_function(old_value, parsed)
                 if new_value != old_value:
-                    html = html[:start] + new_value + html[end:]
+                    edits.append((start, end, new_value))
 
                 # Continue searching after the end of the tag
-                return (html, start + len(new_value))
+                return end
         else:
             # we cound not find out where the tag ended, so we just make sure we do not encounter it again
-            return (html, start + 1)
+            return start + 1
+
+    def update_location(self, file_name: str, start: int) -> None:
+        # Determine where we are (for useful error messages)
+        if self.add_line_in_warning:
+            line_nr = self.line_index.line_number(start)
+            self.location = f"{file_name}:{line_nr}"
+        else:
+            self.location = file_name
 
     def find_where_tag_ends(self, html: str, start: int) -> Optional[tuple[int,ParsedHtmlTag]]:
+        result = self.try_find_where_tag_ends(html, start)
+        if not result:
+            # If not successful after a couple attempts, print a warning
+            warning(f"{self.location} - Could not find end of tag")
+        return result
+
+    def try_find_where_tag_ends(self, html: str, start: int) -> Optional[tuple[int,ParsedHtmlTag]]:
+        """
+        Like find_where_tag_ends, but does not print a warning if the end of the tag can not be determined
+        """
+        # Most tags are simple and well formed, so we try the cheap scanner first
+        if result := scan_html_opening_tag(html, start):
+            return result
+
+        # Otherwise we let the HTML parser figure out, where the tag ends
         search_pos = start
         # Limit to small number to prevent huge performance problems if this is buggy
-        for _ in range(10):
+        for _ in range(MAX_TAG_END_CANDIDATES):
             end = html.find(">", search_pos)
             if end == -1:
                 # End of string reached without finding closing tag
@@ -78,11 +109,27 @@ class HtmlTagHandler:
                     # Either the tag has not ended, or the it contains multiple tags
                     search_pos = end
 
-        # If not successful after a couple attempts, print a warning
-        warning(f"{self.location} - Could not find end of tag")
         return None
 
 
+def apply_edits(text: str, edits: list[tuple[int,int,str]]) -> str:
+    """
+    Replaces the given (start, end, new_value) ranges of the text in a single pass.
+    The edits need to be sorted by their start position and may not overlap.
+    """
+    if not edits:
+        return text
+
+    parts = []
+    position = 0
+    for start, end, new_value in edits:
+        parts.append(text[position:start])
+        parts.append(new_value)
+        position = end
+    parts.append(text[position:])
+    return "".join(parts)
+
+
 class NormalHtmlInputElementHandler(HtmlTagHandler):
     def __init__(self, placeholders: dict, add_line_in_warning: bool) -> None:
         super().__init__(re.compile("<input", re.IGNORECASE), None, add_line_in_warning)
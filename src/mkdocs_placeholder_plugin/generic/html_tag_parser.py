@@ -1,8 +1,17 @@
 from html.parser import HTMLParser
 import html
+import re
 from typing import NamedTuple, Optional
 
 
+# Only match simple and well formed opening tags. Everything else is handled by the (much slower) HtmlTagParser
+ATTRIBUTE_NAME = r"[a-zA-Z_:][-a-zA-Z0-9_:.]*"
+# HTMLParser treats some unicode characters differently in tag names and attribute values, so we only accept ASCII whitespace
+WHITESPACE = r"[ \t\n\r\f]"
+ATTRIBUTE_REGEX = re.compile(f"""({ATTRIBUTE_NAME})(?:{WHITESPACE}*={WHITESPACE}*(?:"([^"]*)"|'([^']*)'|([^\\s"'=<>`]+)))?""")
+OPENING_TAG_REGEX = re.compile(f"""<([a-zA-Z][a-zA-Z0-9-]*)((?:{WHITESPACE}+{ATTRIBUTE_NAME}(?:{WHITESPACE}*={WHITESPACE}*(?:"[^"]*"|'[^']*'|[^\\s"'=<>`]+))?)*){WHITESPACE}*/?>""")
+
+
 class ParsedHtmlTag(NamedTuple):
     tag: str
     attributes: dict[str,str]
@@ -48,3 +57,25 @@ def parse_html_tag(html_str: str) -> ParsedHtmlTag:
         raise Exception(f"Expected one tag, but got {len(parser.results)}")
 
 
+def scan_html_opening_tag(html_str: str, start: int) -> Optional[tuple[int,ParsedHtmlTag]]:
+    """
+    Fast path for parsing the opening tag that starts at the given position.
+    Returns the end of the tag and the parsed tag. This should give the same results as parse_html_tag, but is a lot cheaper.
+    If the tag is not simple and well formed (or has duplicate attributes), None is returned and you should use parse_html_tag instead.
+    """
+    match = OPENING_TAG_REGEX.match(html_str, start)
+    if not match:
+        return None
+
+    attributes = {}
+    # Missing groups are returned as empty strings, which is also what we use for attributes without a value
+    for name, double_quoted, single_quoted, unquoted in ATTRIBUTE_REGEX.findall(match[2]):
+        key = name.lower()
+        if key in attributes:
+            return None
+
+        value = double_quoted or single_quoted or unquoted
+        # Same as HTMLParser: character references in values are resolved
+        attributes[key] = html.unescape(value) if "&" in value else value
+
+    return (match.end(), ParsedHtmlTag(match[1].lower(), attributes))
@@ -2,12 +2,16 @@ import json
 # local
 from . import PlaceholderConfigError
 from .config import Placeholder, InputType, PlaceholderConfig, Validator, ValidatorRule, PlaceholderSettings
+from .config.computed_template import TemplatePart
+from .static.baked_placeholders import BakedPlaceholderReplacer
 
 def generate_json_for_javascript_code(config: PlaceholderConfig) -> str:
     """
     Generate the JSON string, that will replace the placeholder in the JavaScript file
     """
-    placeholder_data_list = [placeholder_to_serializable_dict(x) for x in config.placeholders.values()]
+    # Baked placeholders are already replaced when the site is built, so the JavaScript code does not need to know about them
+    baker = BakedPlaceholderReplacer(config)
+    placeholder_data_list = [placeholder_to_serializable_dict(bake_nested_values(x, baker)) for x in config.placeholders.values() if not x.bake]
     validator_data_list = [validator_to_dict(x) for x in config.validators.values() if x.is_used()]
     settings_data = settings_to_serializable_dict(config.settings)
 
@@ -24,6 +28,7 @@ def settings_to_serializable_dict(settings: PlaceholderSettings) -> dict:
         "apply_change_on_focus_change": settings.apply_change_on_focus_change,
         "debug": settings.debug_javascript,
         "delay_millis": settings.replace_delay_millis,
+        "disabled_replace_modes": settings.disabled_replace_modes,
         "dynamic_prefix": settings.dynamic_prefix,
         "dynamic_suffix": settings.dynamic_suffix,
         "editable_prefix": settings.editable_prefix,
@@ -41,6 +46,22 @@ def settings_to_serializable_dict(settings: PlaceholderSettings) -> dict:
         "static_suffix": settings.static_suffix,
     }
 
+def bake_nested_values(placeholder: Placeholder, baker: BakedPlaceholderReplacer) -> Placeholder:
+    """
+    Replaces baked placeholders in the values of the given placeholder, since the JavaScript code can not expand them
+    """
+    if not placeholder.allow_nested:
+        return placeholder
+    # For checkboxes and dropdown menus the default value is a key of `values`
+    default_value = placeholder.default_value
+    if placeholder.input_type == InputType.Field:
+        default_value = baker.bake_text(default_value)
+    return placeholder._replace(
+        default_value=default_value,
+        values={key: baker.bake_text(value) for key, value in placeholder.values.items()},
+    )
+
+
 def placeholder_to_serializable_dict(placeholder: Placeholder) -> dict:
     placeholder_data = {
         "name": placeholder.name,
@@ -83,15 +104,30 @@ def placeholder_to_serializable_dict(placeholder: Placeholder) -> dict:
         placeholder_data.update({
             "type": "computed",
             "computed_depends_on": placeholder.computed_depends_on,
-            "computed_function": placeholder.computed_function,
         })
 
+        if placeholder.computed_function:
+            placeholder_data["computed_function"] = placeholder.computed_function
+        else:
+            # Already parsed, so that the JavaScript code can directly turn it into a function
+            placeholder_data["computed_template"] = [template_part_to_dict(x) for x in placeholder.computed_template]
+
     else:
         raise Exception(f"Unexpected input type: {placeholder.input_type}")
 
     return placeholder_data
 
 
+def template_part_to_dict(part: TemplatePart) -> dict:
+    if part.placeholder:
+        return {
+            "placeholder": part.placeholder,
+            "filters": [{"name": f.name, "arguments": f.arguments} for f in part.filters],
+        }
+    else:
+        return {"text": part.text}
+
+
 def validator_to_dict(v: Validator) -> dict:
     try:
         return {
@@ -0,0 +1,25 @@
+from bisect import bisect_right
+import re
+
+NEWLINE_REGEX = re.compile("\n")
+
+
+class LineIndex:
+    """
+    Maps offsets in a document to line numbers.
+    The positions of the line breaks are only determined once (when the first line number is requested), afterwards each lookup is a binary search.
+    Offsets always refer to the document that was passed to the constructor, so they stay valid even if replacements are collected for it.
+    """
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self._newline_offsets: list[int] = []
+        self._initialized = False
+
+    def line_number(self, offset: int) -> int:
+        """
+        Returns the (1-based) number of the line that contains the character at the given offset
+        """
+        if not self._initialized:
+            self._newline_offsets = [match.start() for match in NEWLINE_REGEX.finditer(self.text)]
+            self._initialized = True
+        return bisect_right(self._newline_offsets, offset - 1) + 1
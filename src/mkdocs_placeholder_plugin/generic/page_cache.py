@@ -0,0 +1,133 @@
+from functools import cache
+import hashlib
+from importlib.metadata import version, PackageNotFoundError
+import json
+import os
+from typing import Callable, Optional
+# local
+from . import debug, warning, record_warnings
+from .config import PlaceholderConfig
+from .json_generator import placeholder_to_serializable_dict
+
+
+def get_plugin_version() -> str:
+    try:
+        return version("mkdocs-placeholder-plugin")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+@cache
+def get_code_version() -> str:
+    """
+    Returns the plugin version and a hash of the plugin's source code.
+    The version alone is not enough, since it does not change when the code of an editable install is modified
+    """
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code_hash = hashlib.sha256()
+    for directory, dir_names, file_names in os.walk(package_dir):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            if file_name.endswith(".py"):
+                path = os.path.join(directory, file_name)
+                code_hash.update(os.path.relpath(path, package_dir).encode() + b"\0")
+                with open(path, "rb") as f:
+                    code_hash.update(f.read())
+    return f"{get_plugin_version()}-{code_hash.hexdigest()}"
+
+
+def get_config_fingerprint(config: PlaceholderConfig) -> str:
+    """
+    Returns a hash that changes whenever the output of the page processing could change.
+    This includes the plugin's version and code (see get_code_version), since the code may create different outputs for the same config.
+    """
+    placeholder_list = [placeholder_to_serializable_dict(placeholder) for placeholder in config.placeholders.values()]
+    data = {
+        "code_version": get_code_version(),
+        # Only contains primitive values, so the representation does not change between runs
+        "settings": repr(config.settings),
+        "placeholders": placeholder_list,
+        "baked_placeholders": [placeholder.name for placeholder in config.placeholders.values() if placeholder.bake],
+    }
+    return hashlib.sha256(json.dumps(data).encode()).hexdigest()
+
+
+class PageCache:
+    """
+    Stores the results of processing pages on disk, so that unchanged pages do not need to be processed again in the next build.
+    The entries are content addressed: The file name is a hash of the input text, the file name, and the config fingerprint.
+    Warnings that were shown while processing the page are stored with the result and shown again, when the result is reused.
+    """
+    def __init__(self, directory: str, config_fingerprint: str, max_size_bytes: int) -> None:
+        self.directory = directory
+        self.config_fingerprint = config_fingerprint
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_or_create(self, step: str, file_path: str, text: str, create_function: Callable[[str], str]) -> str:
+        """
+        Returns the cached result for the given input or calls `create_function(text)` and caches its result
+        """
+        key_data = "\0".join([self.config_fingerprint, step, file_path, text])
+        entry_path = os.path.join(self.directory, hashlib.sha256(key_data.encode()).hexdigest() + ".json")
+
+        entry = self.load_entry(entry_path)
+        if entry:
+            self.hits += 1
+            for message in entry["warnings"]:
+                warning(message)
+            return entry["output"]
+
+        self.misses += 1
+        with record_warnings() as warnings:
+            output = create_function(text)
+        self.store_entry(entry_path, {"output": output, "warnings": warnings})
+        return output
+
+    def load_entry(self, entry_path: str) -> Optional[dict]:
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            # Update the modification time, so that recently used entries are evicted last
+            os.utime(entry_path)
+            return entry
+        except (OSError, ValueError):
+            # Missing, deleted, or broken (for example by an interrupted build) entries are just recreated
+            return None
+
+    def store_entry(self, entry_path: str, entry: dict) -> None:
+        # Write to a temporary file first, so that other processes never see partially written entries
+        temporary_path = f"{entry_path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(temporary_path, entry_path)
+        except OSError as ex:
+            warning(f"Failed to write page cache entry '{entry_path}': {ex}")
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used entries, until the cache is smaller than the maximum size
+        """
+        entries = []
+        total_size = 0
+        with os.scandir(self.directory) as iterator:
+            for dir_entry in iterator:
+                if dir_entry.is_file():
+                    stat = dir_entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, dir_entry.path))
+                    total_size += stat.st_size
+
+        removed = 0
+        for _mtime, size, path in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+                removed += 1
+            except OSError:
+                pass
+        debug(f"Page cache: {self.hits} hits, {self.misses} misses, removed {removed} old entries, {total_size / 1_000_000:.1f} MB in use")
@@ -0,0 +1,47 @@
+import re
+from typing import Iterable, NamedTuple
+# local
+from .token_regex import compile_token_regex
+
+INPUT_ELEMENT_REGEX = re.compile("<input", re.IGNORECASE)
+# Starts with a literal character, which makes it much faster than searching for "auto-input-table"
+AUTO_TABLE_REGEX = re.compile("-input-table", re.IGNORECASE)
+
+
+class PageTriggers(NamedTuple):
+    # The page contains markers created by DynamicPlaceholderPreprocessor.marker_for_token
+    markers: bool
+    # The page may contain input elements
+    input_elements: bool
+    # The page may contain automatic input tables
+    auto_tables: bool
+
+
+class PagePrefilter:
+    """
+    Cheaply checks which processing steps are needed for a page.
+    It may report false positives (the step will then just not find anything to do), but never false negatives.
+    """
+    def __init__(self, affixes: list[tuple[str,str]], names: Iterable[str], marker_id: str) -> None:
+        names = sorted(names)
+        # One regex per replace mode. Python's regex engine can skip ahead to the prefix, which is much faster than one combined regex
+        self.token_regexes = [compile_token_regex([affix], names) for affix in affixes]
+        self.marker_id = marker_id
+
+    def may_contain_placeholders(self, text: str) -> bool:
+        """
+        Checks if the text contains a placeholder using one of the given replace modes.
+        Stops at the first match, so it is much cheaper than actually replacing the placeholders
+        """
+        return any(regex.search(text) for regex in self.token_regexes)
+
+    def classify(self, html: str, auto_table_insertion: bool) -> PageTriggers:
+        """
+        Set auto_table_insertion, if an automatic table will be added to the page anyways
+        """
+        markers = bool(self.marker_id) and self.marker_id in html
+        auto_tables = auto_table_insertion or AUTO_TABLE_REGEX.search(html) is not None
+        # If the page has to be processed anyways, the input element handler will search for input elements itself.
+        # So we only search for them, if it could save us from processing the page
+        input_elements = markers or auto_tables or INPUT_ELEMENT_REGEX.search(html) is not None
+        return PageTriggers(markers=markers, input_elements=input_elements, auto_tables=auto_tables)
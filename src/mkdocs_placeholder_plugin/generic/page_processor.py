@@ -1,45 +1,366 @@
-
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+import threading
+from typing import Iterable, NamedTuple, Optional
 # local
-from .config import PlaceholderConfig
+from . import debug
+from .config import PlaceholderConfig, PlaceholderSettings
 from .static.placeholder_replacer import DynamicPlaceholderPreprocessor
+from .static.baked_placeholders import BakedPlaceholderReplacer
 from .static.table_replacer import StaticHtmlElementTableFallbackReplacer
 from .static.table_generator import TableGenerator
 from .static.input_elements import StaticInputElementReplacer
-from .html_tag_handler import NormalHtmlInputElementHandler, HtmlTagHandler
+from .static.fragment_cache import HtmlFragmentCache
+from .html_tag_handler import NormalHtmlInputElementHandler, HtmlTagHandler, apply_edits
+from .html_tag_parser import ParsedHtmlTag, parse_html_tag
+from .line_index import LineIndex
+from .page_prefilter import PagePrefilter, PageTriggers
 
 END_OF_TITLE = "</h1>"
+AUTO_TABLE_OPENING_TAG = '<div class="auto-input-table" data-hide-empty data-columns="description-or-name,input">'
+AUTO_TABLE_CLOSING_TAG = "</div>"
+
+
+class TagHandlers(NamedTuple):
+    """
+    The HTML tag handlers store information about the page they are currently processing, so each thread needs its own instances
+    """
+    html_table_replacer: Optional[StaticHtmlElementTableFallbackReplacer]
+    input_tag_modifier: HtmlTagHandler
+    # The fused HTML stage looks for the start tags handled by all steps at the same time.
+    # Each handler keeps its own regex, since Python's regex engine is a lot faster for simple patterns than for a combined alternation
+    fused: list[HtmlTagHandler]
+
+
+class FoundTag(NamedTuple):
+    start: int
+    end: int
+    parsed: ParsedHtmlTag
+    handler: HtmlTagHandler
+
+
+class TagScanResult(NamedTuple):
+    tags: list[FoundTag]
+    # False, if the page contains constructs that are not supported by a single scan (like tags inside of tags or malformed tags)
+    supported: bool
+    # Start positions of tags, where the end could not be determined
+    tags_without_end: list[int]
+
 
 class PageProcessor:
-    def __init__(self, config: PlaceholderConfig) -> None:
+    def __init__(self, config: PlaceholderConfig, unique: Optional[str] = None) -> None:
+        """
+        The processed markdown contains temporary markers, that are only understood by the same PageProcessor.
+        Set `unique` to a value derived from the config, if the results should be compatible with other instances (for example when they are cached)
+
+        Pages can be processed from multiple threads at the same time.
+        """
         self.config = config
-        self.dynamic_placeholder_preprocessor = DynamicPlaceholderPreprocessor(config)
-        self.table_generator = TableGenerator(config)
+        # Shared by all steps, so that each fragment is only created once per config
+        self.fragment_cache = HtmlFragmentCache()
+        self.dynamic_placeholder_preprocessor = DynamicPlaceholderPreprocessor(config, self.fragment_cache, unique)
+        self.table_generator = TableGenerator(config, self.fragment_cache)
+        self.baker = BakedPlaceholderReplacer(config)
         self.generate_fallback = self.config.settings.create_no_js_fallback
+        # Stores the TagHandlers of each thread
+        self.thread_local = threading.local()
+        self.auto_table_opening_tag_parsed = parse_html_tag(AUTO_TABLE_OPENING_TAG)
+
+        # Most pages do not use placeholders, so we check cheaply which steps can be skipped
+        marker_id = f"_{self.dynamic_placeholder_preprocessor.unique}_" if self.generate_fallback else ""
+        self.prefilter = PagePrefilter(self.dynamic_placeholder_preprocessor.affixes, config.placeholders.keys(), marker_id)
+        # Step name -> number of pages where it was skipped
+        self.skipped_pages: dict[str,int] = {"html": 0, "markers": 0, "auto tables": 0}
+        self.statistics_lock = threading.Lock()
+        # Settings (as string) -> PageProcessor for the pages that use them (see for_settings)
+        self.page_processors: dict[str,PageProcessor] = {}
+        self.page_processors_lock = threading.Lock()
+        # The PageProcessor, that this one was created from with for_settings (see PageProcessorPool)
+        self.root = self
+
+    def for_settings(self, settings: PlaceholderSettings) -> "PageProcessor":
+        """
+        Returns a PageProcessor for pages with different settings (see parse_page_settings).
+        It creates the same markers and shares the statistics with this instance.
+        The instances are cached, since usually many pages use the same settings
+        """
+        if settings == self.config.settings:
+            return self
+
+        key = repr(settings)
+        with self.page_processors_lock:
+            page_processor = self.page_processors.get(key)
+            if page_processor is None:
+                page_processor = PageProcessor(self.config._replace(settings=settings), self.dynamic_placeholder_preprocessor.unique)
+                page_processor.root = self.root
+                page_processor.skipped_pages = self.skipped_pages
+                page_processor.statistics_lock = self.statistics_lock
+                self.page_processors[key] = page_processor
+            return page_processor
+
+    def get_tag_handlers(self) -> TagHandlers:
+        """
+        Returns the tag handlers of the current thread
+        """
+        tag_handlers = getattr(self.thread_local, "tag_handlers", None)
+        if tag_handlers is None:
+            tag_handlers = self.create_tag_handlers()
+            self.thread_local.tag_handlers = tag_handlers
+        return tag_handlers
 
+    def create_tag_handlers(self) -> TagHandlers:
         # Set the value for inputs to inform the user to enable JavaScript
         # Line numbers in output are disabled, since we need to call this after the markdown was parsed.
         # Otherwise stuff in listings and co may be unintentianally modified/checked
         add_line_in_warning = False
         if self.generate_fallback:
-            self.html_table_replacer = StaticHtmlElementTableFallbackReplacer(config, add_line_in_warning)
-        
-        self.input_tag_modifier: HtmlTagHandler = StaticInputElementReplacer(config.placeholders, add_line_in_warning) \
-            if self.generate_fallback else NormalHtmlInputElementHandler(config.placeholders, add_line_in_warning)
-
-    def process_page_markdown(self, markdown: str) -> str:
-        if self.config.settings.create_no_js_fallback:
-            markdown = self.dynamic_placeholder_preprocessor.handle_markdown_page(markdown)
-                
-        return markdown
-
-    def process_page_html(self, file_path: str, html: str) -> str:
-        if self.config.settings.auto_placeholder_tables:
+            html_table_replacer = StaticHtmlElementTableFallbackReplacer(self.config, add_line_in_warning, self.fragment_cache)
+            input_tag_modifier: HtmlTagHandler = StaticInputElementReplacer(self.config.placeholders, add_line_in_warning, self.fragment_cache)
+            return TagHandlers(html_table_replacer, input_tag_modifier, [html_table_replacer, input_tag_modifier])
+        else:
+            input_tag_modifier = NormalHtmlInputElementHandler(self.config.placeholders, add_line_in_warning)
+            return TagHandlers(None, input_tag_modifier, [input_tag_modifier])
+
+    def count_skipped_page(self, step: str) -> None:
+        with self.statistics_lock:
+            self.skipped_pages[step] += 1
+
+    def process_page_html(self, file_path: str, html: str, resolve_markers: bool = True) -> str:
+        """
+        Set `resolve_markers` to False, if the markers should stay in the page (to be resolved later with resolve_markers_in_output).
+        The automatic tables are still created as if the markers were resolved
+        """
+        html = self.baker.bake_html(html)
+        triggers = self.classify_html_page(html)
+        if not any(triggers):
+            self.count_skipped_page("html")
+            return html
+
+        result = self.process_page_html_fused(file_path, html, triggers, resolve_markers)
+        if result is None:
+            # The fused pipeline can not guarantee the same results for some unusual pages (like tags inside of tags or malformed tags)
+            debug(f"{file_path}: Falling back to step by step HTML processing")
+            result = self.process_page_html_step_by_step(file_path, html, resolve_markers=resolve_markers)
+        else:
+            if not triggers.markers:
+                self.count_skipped_page("markers")
+            if not triggers.auto_tables:
+                self.count_skipped_page("auto tables")
+        return result
+
+    def process_pages(self, pages: Iterable[tuple[str,str]], workers: int = 1, pool: Optional["PageProcessorPool"] = None) -> list[str]:
+        """
+        Runs process_page_html for all (file_path, html) pairs and returns the results in the same order.
+        The work is split between `workers` threads.
+        Since the regex matching holds Python's global interpreter lock, only processes can use multiple CPU cores at the same time.
+        To use them, pass a `pool`, that was created for this PageProcessor (or the one it was created from with for_settings)
+        """
+        if pool is not None:
+            return pool.process_pages(self, pages)
+
+        if workers <= 1:
+            return [self.process_page_html(file_path, html) for file_path, html in pages]
+
+        with ThreadPoolExecutor(workers) as executor:
+            return list(executor.map(self._process_page_tuple, pages))
+
+    def _process_page_tuple(self, page: tuple[str,str]) -> str:
+        return self.process_page_html(page[0], page[1])
+
+    def process_page_html_step_by_step(self, file_path: str, html: str, insert_auto_table: bool = True, resolve_markers: bool = True) -> str:
+        """
+        Runs all HTML modifications one after another. Each step scans (and copies) the whole page.
+        """
+        if insert_auto_table and self.config.settings.auto_placeholder_tables:
             # Add directly behind the title. Looks better than simply appending before everything else
-            html = html.replace(END_OF_TITLE, f'{END_OF_TITLE}<div class="auto-input-table" data-hide-empty data-columns="description-or-name,input"></div>', 1) 
+            html = html.replace(END_OF_TITLE, f'{END_OF_TITLE}{AUTO_TABLE_OPENING_TAG}{AUTO_TABLE_CLOSING_TAG}', 1)
 
-        if self.config.settings.create_no_js_fallback:
-            html = self.dynamic_placeholder_preprocessor.handle_html_page(html)
-            html = self.html_table_replacer.process_string(file_path, html)
+        tag_handlers = self.get_tag_handlers()
+        html_table_replacer = tag_handlers.html_table_replacer
+        if html_table_replacer:
+            if resolve_markers:
+                html = self.dynamic_placeholder_preprocessor.handle_html_page(html)
+                html = html_table_replacer.process_string(file_path, html)
+            else:
+                # The tables need to know which placeholders are used on the page after the dynamic placeholders were resolved
+                resolved_html = self.dynamic_placeholder_preprocessor.handle_html_page(html)
+                html_table_replacer.page_used_placeholder_names = html_table_replacer.table_generator.usage_scanner.find_used_placeholders(resolved_html)
+                try:
+                    html = html_table_replacer.process_string(file_path, html)
+                finally:
+                    html_table_replacer.page_used_placeholder_names = None
 
-        html = self.input_tag_modifier.process_string(file_path, html)
+        html = tag_handlers.input_tag_modifier.process_string(file_path, html)
         return html
+
+    def get_statistics(self) -> str:
+        return "skipped pages per step: " + ", ".join([f"{step}: {count}" for step, count in self.skipped_pages.items()])
+
+    def classify_html_page(self, html: str) -> PageTriggers:
+        """
+        Checks which steps of the HTML stage may modify the page
+        """
+        # The automatic table will be inserted after the title
+        auto_table_insertion = self.config.settings.auto_placeholder_tables and END_OF_TITLE in html
+        return self.prefilter.classify(html, auto_table_insertion)
+
+    def process_page_html_fused(self, file_path: str, html: str, triggers: Optional[PageTriggers] = None, resolve_markers: bool = True) -> Optional[str]:
+        """
+        Performs the same modifications as process_page_html_step_by_step, but in a single left to right scan over the page.
+        Returns None, if the page contains constructs where the results of both methods could differ.
+        Steps, that are not needed according to the triggers (see classify_html_page), are skipped.
+        """
+        if triggers is None:
+            triggers = self.classify_html_page(html)
+        active_handlers = self.get_active_tag_handlers(triggers)
+
+        # Position where the automatic input table will be inserted
+        table_insert_pos = -1
+        if self.config.settings.auto_placeholder_tables:
+            table_insert_pos = html.find(END_OF_TITLE)
+            if table_insert_pos != -1:
+                table_insert_pos += len(END_OF_TITLE)
+
+        scan = self.find_tags(html, len(html), active_handlers, table_insert_pos)
+        if not scan.supported:
+            return None
+        return self.apply_tag_handlers(file_path, html, len(html), scan.tags, active_handlers, triggers, table_insert_pos, resolve_markers)
+
+    def get_active_tag_handlers(self, triggers: PageTriggers) -> list[HtmlTagHandler]:
+        html_table_replacer = self.get_tag_handlers().html_table_replacer
+        return [handler for handler in self.get_tag_handlers().fused
+                if (triggers.auto_tables if handler is html_table_replacer else triggers.input_elements)]
+
+    def find_tags(self, html: str, limit: int, active_handlers: list[HtmlTagHandler], table_insert_pos: int) -> TagScanResult:
+        """
+        Finds all tags that start before `limit` and are handled by one of the given handlers.
+        Tags may end after the limit. Those need to be checked again, when the text after the limit is complete (see StreamingPageProcessor).
+        """
+        # First we find all tags without calling any handlers.
+        # That way nothing is printed twice, if we need to fall back to the step by step processing
+        tags: list[FoundTag] = []
+        tags_without_end: list[int] = []
+        supported = True
+        marker_id = self.prefilter.marker_id
+        search_start_pos = 0
+        # The next match of every handler. They are merged, so that the page is processed from left to right
+        next_matches = [handler.start_regex.search(html) for handler in active_handlers]
+        while True:
+            candidates = []
+            for index, handler in enumerate(active_handlers):
+                next_match = next_matches[index]
+                if next_match and next_match.start() < search_start_pos:
+                    # This would start inside of something that was already handled
+                    next_match = next_matches[index] = handler.start_regex.search(html, search_start_pos)
+                if next_match and next_match.start() < limit:
+                    candidates.append((next_match.start(), index))
+
+            if not candidates:
+                return TagScanResult(tags, supported and not tags_without_end, tags_without_end)
+            start, index = min(candidates)
+            handler = active_handlers[index]
+
+            end_and_parsed = handler.try_find_where_tag_ends(html, start)
+            if not end_and_parsed:
+                tags_without_end.append(start)
+                search_start_pos = start + 1
+                continue
+
+            end, parsed = end_and_parsed
+            # Tags ending after the limit are returned without checking the end regex, since it may need to look at text that is not known yet
+            if end <= limit and handler.end_regex and not handler.end_regex.match(html, end):
+                search_start_pos = start + 1
+                continue
+
+            # The other steps would also look inside the tag. This is not supported by a single scan
+            if html.find("<", start + 1, end) != -1 or start < table_insert_pos < end \
+                    or (marker_id and html.find(marker_id, start, end) != -1):
+                supported = False
+
+            tags.append(FoundTag(start, end, parsed, handler))
+            search_start_pos = end
+
+    def apply_tag_handlers(self, file_path: str, html: str, limit: int, tags: list[FoundTag], active_handlers: list[HtmlTagHandler],
+                           triggers: PageTriggers, table_insert_pos: int, resolve_markers: bool = True) -> str:
+        """
+        Resolves the markers (unless `resolve_markers` is False), inserts the automatic table and lets the handlers replace the given tags.
+        Returns the modified version of `html[:limit]`. Text after the limit is only used to check where the tags end.
+        """
+        edits: list[tuple[int,int,str]] = []
+        if triggers.markers:
+            # Markers can not overlap with tags (they do not contain '<' and tags containing them were rejected by find_tags)
+            resolve_marker = self.dynamic_placeholder_preprocessor.resolve_marker
+            edits = [(match.start(), match.end(), resolve_marker(match))
+                     for match in self.dynamic_placeholder_preprocessor.marker_regex.finditer(html, 0, limit)]
+
+        html_table_replacer = self.get_tag_handlers().html_table_replacer
+        table_insert_text = AUTO_TABLE_OPENING_TAG + AUTO_TABLE_CLOSING_TAG
+        if html_table_replacer and (table_insert_pos != -1 or any(tag.handler is html_table_replacer for tag in tags)):
+            if html_table_replacer.page_used_placeholder_names is None:
+                # The tables need to know which placeholders are used on the page after the dynamic placeholders were resolved
+                edits_before_tables = list(edits)
+                if table_insert_pos != -1:
+                    edits_before_tables.append((table_insert_pos, table_insert_pos, table_insert_text))
+                    edits_before_tables.sort(key=lambda edit: (edit[0], edit[1]))
+                html_table_replacer.full_text_string = apply_edits(html, edits_before_tables)
+            html_table_replacer.update_location(file_path, max(table_insert_pos, 0))
+            table_insert_text = html_table_replacer.replace_function(AUTO_TABLE_OPENING_TAG, self.auto_table_opening_tag_parsed) + AUTO_TABLE_CLOSING_TAG
+
+        if not resolve_markers:
+            # The markers were only needed to find the placeholders shown in the tables
+            edits = []
+        if table_insert_pos != -1:
+            edits.append((table_insert_pos, table_insert_pos, table_insert_text))
+
+        for handler in active_handlers:
+            handler.line_index = LineIndex(html)
+        for start, end, parsed, handler in tags:
+            handler.update_location(file_path, start)
+            old_value = html[start:end]
+            new_value = handler.replace_function(old_value, parsed)
+            if new_value != old_value:
+                edits.append((start, end, new_value))
+
+        # An insertion (empty range) needs to come before a replacement that starts at the same position
+        edits.sort(key=lambda edit: (edit[0], edit[1]))
+        return apply_edits(html if limit == len(html) else html[:limit], edits)
+
+
+class PageProcessorPool:
+    """
+    Worker processes, that process pages for the given PageProcessors and the ones created from them with for_settings.
+    Starting the processes is slow, so the same pool should be used for all pages of a build.
+    """
+    def __init__(self, page_processors: list[PageProcessor], workers: int) -> None:
+        unique_values = {page_processor.dynamic_placeholder_preprocessor.unique for page_processor in page_processors}
+        if len(unique_values) != 1:
+            raise Exception("[Internal error] The PageProcessors of a pool need to use the same markers")
+        # The root PageProcessor (by id) -> its index in the workers' list of PageProcessors
+        self.indices = {id(page_processor.root): index for index, page_processor in enumerate(page_processors)}
+        configs = [page_processor.root.config for page_processor in page_processors]
+        self.executor = ProcessPoolExecutor(workers, initializer=_initialize_worker, initargs=(configs, unique_values.pop()))
+
+    def process_pages(self, page_processor: PageProcessor, pages: Iterable[tuple[str,str]]) -> list[str]:
+        index = self.indices.get(id(page_processor.root))
+        if index is None:
+            raise Exception("[Internal error] The PageProcessorPool was not created for this PageProcessor")
+        return list(self.executor.map(partial(_process_page_in_worker, index, page_processor.config.settings), pages))
+
+    def __enter__(self) -> "PageProcessorPool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.executor.shutdown()
+
+
+# Each worker process of a PageProcessorPool has its own PageProcessors. They use the same markers, so that they can handle our processed markdown
+_WORKER_PAGE_PROCESSORS: list[PageProcessor] = []
+
+def _initialize_worker(configs: list[PlaceholderConfig], unique: str) -> None:
+    global _WORKER_PAGE_PROCESSORS
+    _WORKER_PAGE_PROCESSORS = [PageProcessor(config, unique) for config in configs]
+
+def _process_page_in_worker(index: int, settings: PlaceholderSettings, page: tuple[str,str]) -> str:
+    if not _WORKER_PAGE_PROCESSORS:
+        raise Exception("[Internal error] Worker was not initialized")
+    return _WORKER_PAGE_PROCESSORS[index].for_settings(settings).process_page_html(page[0], page[1])
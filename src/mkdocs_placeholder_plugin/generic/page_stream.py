@@ -0,0 +1,142 @@
+import tempfile
+from typing import Iterator, Optional, TextIO
+# local
+from .html_tag_handler import MAX_TAG_END_CANDIDATES
+from .page_processor import PageProcessor, END_OF_TITLE
+
+# Characters that are read at once. The memory usage is a small multiple of this
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+def find_safe_split_position(html: str) -> int:
+    """
+    Returns the position of the last '<' that starts an opening tag (or a comment, doctype, etc).
+    None of the handled tags, tokens, or markers can contain text before and after this position.
+    Closing tags are skipped, since the table handler needs to see the '</div>' after its opening tag.
+    Returns 0, if there is no such position.
+    """
+    position = len(html) - 1
+    while (position := html.rfind("<", 0, position)) > 0:
+        if html[position + 1] != "/":
+            return position
+    return 0
+
+
+class StreamingPageProcessor:
+    """
+    Processes a HTML page like PageProcessor.process_page_html, but reads it from a file-like object and writes the result to another one.
+    Only a window of about `chunk_size` characters is kept in memory, so that even huge pages can be processed.
+    The window grows, if it does not contain the start of a tag (for example a huge text without any tags).
+
+    If the page may contain automatic input tables, the input is read twice: once to find the placeholders used on the page and once to modify it.
+    Inputs that do not support seeking are copied to a temporary file first.
+    """
+    def __init__(self, page_processor: PageProcessor, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        self.page_processor = page_processor
+        self.chunk_size = chunk_size
+
+    def process_stream(self, file_path: str, input: TextIO, output: TextIO) -> None:
+        html_table_replacer = self.page_processor.get_tag_handlers().html_table_replacer
+        if not html_table_replacer:
+            self.process_windows(file_path, input, output)
+            return
+
+        temporary_file: Optional[TextIO] = None
+        try:
+            if not input.seekable():
+                temporary_file = tempfile.TemporaryFile("w+", encoding="utf-8")
+            start_position = input.tell() if temporary_file is None else 0
+            html_table_replacer.page_used_placeholder_names = self.find_used_placeholder_names(input, temporary_file)
+
+            if temporary_file:
+                input = temporary_file
+            input.seek(start_position)
+            self.process_windows(file_path, input, output)
+        finally:
+            html_table_replacer.page_used_placeholder_names = None
+            if temporary_file:
+                temporary_file.close()
+
+    def read_segments(self, input: TextIO, copy_to: Optional[TextIO] = None) -> Iterator[str]:
+        """
+        Splits the input into parts, that end directly before an opening tag
+        """
+        buffer = ""
+        while chunk := input.read(self.chunk_size):
+            if copy_to:
+                copy_to.write(chunk)
+            buffer += chunk
+            split_position = find_safe_split_position(buffer)
+            if split_position > 0:
+                yield buffer[:split_position]
+                buffer = buffer[split_position:]
+        if buffer:
+            yield buffer
+
+    def find_used_placeholder_names(self, input: TextIO, copy_to: Optional[TextIO]) -> set[str]:
+        """
+        Returns the placeholders used on the page after the markers were resolved, just like process_page_html_fused does for a whole page
+        """
+        preprocessor = self.page_processor.dynamic_placeholder_preprocessor
+        usage_scanner = self.page_processor.table_generator.usage_scanner
+        used_names: set[str] = set()
+        for segment in self.read_segments(input, copy_to):
+            segment = preprocessor.handle_html_page(self.page_processor.baker.bake_html(segment))
+            used_names |= usage_scanner.find_used_placeholders(segment)
+        return used_names
+
+    def process_windows(self, file_path: str, input: TextIO, output: TextIO) -> None:
+        # The automatic table is only inserted after the first title of the page
+        insert_auto_table = self.page_processor.config.settings.auto_placeholder_tables
+        buffer = ""
+        # Tokens can not contain the start of a tag, so the baked placeholders can be replaced in each segment on its own
+        segments = (self.page_processor.baker.bake_html(segment) for segment in self.read_segments(input))
+        at_end = False
+        while not at_end:
+            segment = next(segments, "")
+            at_end = not segment
+            buffer += segment
+            limit = len(buffer) if at_end else find_safe_split_position(buffer)
+            if limit > 0:
+                processed_until, result, table_inserted = self.process_window(file_path, buffer, limit, at_end, insert_auto_table)
+                output.write(result)
+                buffer = buffer[processed_until:]
+                insert_auto_table = insert_auto_table and not table_inserted
+
+    def process_window(self, file_path: str, html: str, limit: int, at_end: bool, insert_auto_table: bool) -> tuple[int,str,bool]:
+        """
+        Processes the beginning of `html`, up to at most `limit`. The rest is only used to see where tags end.
+        Returns how many characters were processed, the modified version of them, and whether the automatic table was inserted.
+        """
+        processor = self.page_processor
+        while True:
+            table_insert_pos = -1
+            if insert_auto_table:
+                table_insert_pos = html.find(END_OF_TITLE, 0, limit)
+                if table_insert_pos != -1:
+                    table_insert_pos += len(END_OF_TITLE)
+
+            # Checking the whole window may report more steps than needed, but never less
+            triggers = processor.prefilter.classify(html, table_insert_pos != -1)
+            if not any(triggers):
+                return limit, html[:limit], False
+
+            active_handlers = processor.get_active_tag_handlers(triggers)
+            scan = processor.find_tags(html, limit, active_handlers, table_insert_pos)
+            # Tags that continue after the limit are processed together with the next window
+            unfinished_tag_starts = [tag.start for tag in scan.tags if tag.end > limit]
+            if not at_end:
+                # The end of a tag may not have been found, because it is not yet in the window
+                unfinished_tag_starts += [start for start in scan.tags_without_end if html.count(">", start) < MAX_TAG_END_CANDIDATES]
+            if not unfinished_tag_starts:
+                break
+            limit = min(unfinished_tag_starts)
+            if limit == 0:
+                # We need to read more of the page
+                return 0, "", False
+
+        if scan.supported:
+            result = processor.apply_tag_handlers(file_path, html, limit, scan.tags, active_handlers, triggers, table_insert_pos)
+        else:
+            result = processor.process_page_html_step_by_step(file_path, html[:limit], table_insert_pos != -1)
+        return limit, result, table_insert_pos != -1
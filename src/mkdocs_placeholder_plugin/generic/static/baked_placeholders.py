@@ -0,0 +1,61 @@
+import html
+import re
+# local
+from ..config import PlaceholderConfig
+from ..page_prefilter import PagePrefilter
+from ..token_regex import compile_token_regex, get_token_match
+
+
+class BakedPlaceholderReplacer:
+    """
+    Replaces the placeholders with `bake: true` with their expanded default values, when the site is built.
+    Baked placeholders are not passed to the JavaScript code, so their values never need to be replaced in the browser.
+    """
+    def __init__(self, config: PlaceholderConfig) -> None:
+        self.config = config
+        self.names = [placeholder.name for placeholder in config.placeholders.values() if placeholder.bake]
+
+        s = config.settings
+        # Like regex_html in parse_settings.ts, the optional prefix is replaced too. It needs to come first, so that it is preferred
+        modes = [
+            ("html", (s.html_prefix_optional + s.html_prefix, s.html_suffix)),
+            ("html", (s.html_prefix, s.html_suffix)),
+            ("dynamic", (s.dynamic_prefix, s.dynamic_suffix)),
+            ("editable", (s.editable_prefix, s.editable_suffix)),
+            ("normal", (s.normal_prefix, s.normal_suffix)),
+            ("static", (s.static_prefix, s.static_suffix)),
+        ]
+        # Nested placeholders are expanded regardless of the replace mode, just like in replace_placeholder_in_string_with in replacer.ts
+        self.nested_token_regex = compile_token_regex([affix for _, affix in modes], self.names)
+
+        modes = [mode for mode in modes if mode[0] not in s.disabled_replace_modes]
+        self.affixes = [affix for _, affix in modes]
+        # Indices of the affixes that belong to the inner HTML replace method
+        self.html_affix_indices = [index for index, (mode, _) in enumerate(modes) if mode == "html"]
+        self.token_regex = compile_token_regex(self.affixes, self.names)
+        self.prefilter = PagePrefilter(self.affixes, self.names, "")
+
+    def bake_html(self, page_html: str) -> str:
+        """
+        Replaces the baked placeholders in a HTML page (or a part of it that does not split any tokens)
+        """
+        if not self.names or not self.prefilter.may_contain_placeholders(page_html):
+            return page_html
+        return self.token_regex.sub(self._html_for_token, page_html)
+
+    def _html_for_token(self, match: re.Match) -> str:
+        index, name = get_token_match(match)
+        value = self.config.expanded_default_values[name]
+        if index in self.html_affix_indices:
+            # Same as do_html_replace in replacer.ts: The value is only inserted as HTML, if the placeholder allows it
+            return value if self.config.placeholders[name].replace_everywhere else match[0]
+        else:
+            return html.escape(value)
+
+    def bake_text(self, text: str) -> str:
+        """
+        Replaces the baked placeholders in the value of another placeholder, similar to how the JavaScript code expands nested placeholders
+        """
+        if not self.names:
+            return text
+        return self.nested_token_regex.sub(lambda match: self.config.expanded_default_values[get_token_match(match)[1]], text)
@@ -0,0 +1,202 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+from typing import NamedTuple, Optional
+# local
+from .. import PlaceholderConfigError, set_logger, set_warnings_enabled
+from ..config import PlaceholderConfig
+from ..config.configuration import parse_configuration_file
+from ..page_cache import get_config_fingerprint
+from .input_elements import StaticInputElementReplacer
+from .table_replacer import StaticHtmlElementTableFallbackReplacer
+
+DEFAULT_STATE_FILE = ".cache/placeholder/static-replacer-state.json"
+
+
+class FileResult(NamedTuple):
+    path: str
+    size: int
+    modified: bool
+    # True, if the file still had the hash from the last run, so it was not processed again
+    skipped: bool
+    # The hash and file status after the file was written, used to detect unchanged files in the next run
+    sha256: str
+    mtime_ns: int
+    ctime_ns: int
+
+
+class StaticFileReplacer:
+    """
+    Replaces input elements and automatic input tables in HTML files with static versions, that work without JavaScript
+    """
+    def __init__(self, config: PlaceholderConfig) -> None:
+        # The line numbers are useful, since we work directly on the HTML files
+        add_line_in_warning = True
+        self.handlers = [
+            StaticHtmlElementTableFallbackReplacer(config, add_line_in_warning),
+            StaticInputElementReplacer(config.placeholders, add_line_in_warning),
+        ]
+
+    def process_file(self, path: str, previous_sha256: Optional[str] = None) -> FileResult:
+        """
+        Processes the file, unless its hash is `previous_sha256` (the hash after it was last written by us)
+        """
+        # Read as bytes, so that the size and hash match the file on disk
+        with open(path, "rb") as f:
+            data = f.read()
+        sha256 = hashlib.sha256(data).hexdigest()
+        skipped = sha256 == previous_sha256
+        modified = False
+        if not skipped:
+            # No newline translation, so that unmodified parts of the file stay the same
+            original = data.decode("utf-8")
+            contents = original
+            for handler in self.handlers:
+                contents = handler.process_string(path, contents)
+
+            modified = contents != original
+            if modified:
+                write_file_atomic(path, contents)
+                data = contents.encode("utf-8")
+                sha256 = hashlib.sha256(data).hexdigest()
+
+        stat = os.stat(path)
+        return FileResult(path, len(data), modified, skipped, sha256, stat.st_mtime_ns, stat.st_ctime_ns)
+
+
+def write_file_atomic(path: str, contents: str) -> None:
+    # Readers (like a web server) either see the old or the new file, but never a partially written one
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, "w", encoding="utf-8", newline="") as f:
+            f.write(contents)
+        if os.path.exists(path):
+            # Otherwise the file would get the default permissions
+            shutil.copymode(path, temporary_path)
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
+# Each worker process parses the configuration once and then processes many files
+_WORKER_REPLACER: Optional[StaticFileReplacer] = None
+
+def _initialize_worker(placeholder_file: str, warnings_enabled: bool) -> None:
+    global _WORKER_REPLACER
+    # Depending on the platform, the worker processes may not inherit the logging setup
+    logging.basicConfig(format="%(levelname)s: %(message)s")
+    set_warnings_enabled(warnings_enabled)
+    _WORKER_REPLACER = StaticFileReplacer(parse_configuration_file(placeholder_file))
+
+def _process_file_in_worker(task: tuple[str,Optional[str]]) -> FileResult:
+    if _WORKER_REPLACER is None:
+        raise Exception("[Internal error] Worker was not initialized")
+    return _WORKER_REPLACER.process_file(*task)
+
+
+def is_unchanged(path: str, state: dict) -> bool:
+    """
+    Cheaply checks if the file is still the way we left it in the last run, without reading it.
+    Besides the modification time (which tools like `rsync -t` restore) the status change time is compared, which is updated by every write.
+    Files that fail this check are hashed by the workers (see StaticFileReplacer.process_file), so touched but unchanged files are not processed again
+    """
+    previous = state.get(path)
+    if not previous:
+        return False
+
+    stat = os.stat(path)
+    return stat.st_size == previous.get("size") and stat.st_mtime_ns == previous.get("mtime_ns") and stat.st_ctime_ns == previous.get("ctime_ns")
+
+
+def load_state(state_file: str, config_fingerprint: str) -> dict:
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if data.get("config_fingerprint") != config_fingerprint:
+        # The configuration changed, so all files need to be processed again
+        return {}
+    return data.get("files", {})
+
+
+def save_state(state_file: str, config_fingerprint: str, files: dict) -> None:
+    parent_dir = os.path.dirname(state_file)
+    if parent_dir:
+        os.makedirs(parent_dir, exist_ok=True)
+    write_file_atomic(state_file, json.dumps({"config_fingerprint": config_fingerprint, "files": files}))
+
+
+def find_files(base_dir: str, patterns: list[str]) -> list[str]:
+    files = set()
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(base_dir, pattern), recursive=True):
+            if os.path.isfile(path):
+                files.add(os.path.normpath(path))
+    return sorted(files)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replace input elements and automatic input tables in HTML files with static versions that work without JavaScript")
+    parser.add_argument("patterns", nargs="+", metavar="GLOB", help="the files to process (relative to the base directory), for example '**/*.html'")
+    parser.add_argument("-p", "--placeholder-file", default="placeholder-plugin.yaml", help="the placeholder configuration file. Default: %(default)s")
+    parser.add_argument("-b", "--base-dir", default=".", help="the directory that the patterns are relative to, usually your site directory. Default: %(default)s")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="number of worker processes. Default: number of CPUs")
+    parser.add_argument("-s", "--state-file", default=DEFAULT_STATE_FILE, help="stores which files were already processed, so that they can be skipped in the next run. Default: %(default)s")
+    parser.add_argument("-f", "--force", action="store_true", help="process all files, even if they were not modified since the last run")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print warnings")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(levelname)s: %(message)s")
+    set_logger(logging.getLogger("mkdocs-placeholder-replace-static"))
+    try:
+        config = parse_configuration_file(args.placeholder_file)
+    except PlaceholderConfigError as ex:
+        print(f"[-] {ex}", file=sys.stderr)
+        sys.exit(1)
+    warnings_enabled = config.settings.show_warnings and not args.quiet
+    set_warnings_enabled(warnings_enabled)
+
+    start_time = time.time()
+    config_fingerprint = get_config_fingerprint(config)
+    state = {} if args.force else load_state(args.state_file, config_fingerprint)
+    all_files = find_files(args.base_dir, args.patterns)
+    files = [path for path in all_files if not is_unchanged(path, state)]
+    # The workers compare the hashes, so that each file is only read once
+    tasks = [(path, state[path].get("sha256") if path in state else None) for path in files]
+
+    if args.jobs > 1 and len(files) > 1:
+        with ProcessPoolExecutor(args.jobs, initializer=_initialize_worker, initargs=(args.placeholder_file, warnings_enabled)) as executor:
+            # Bigger chunks reduce the communication overhead for many small files
+            chunk_size = max(1, min(64, len(files) // (args.jobs * 4)))
+            results = list(executor.map(_process_file_in_worker, tasks, chunksize=chunk_size))
+    else:
+        replacer = StaticFileReplacer(config)
+        results = [replacer.process_file(*task) for task in tasks]
+
+    # Only keep the state of files that still exist
+    new_state = {path: state[path] for path in all_files if path in state}
+    for result in results:
+        new_state[result.path] = {"size": result.size, "mtime_ns": result.mtime_ns, "ctime_ns": result.ctime_ns, "sha256": result.sha256}
+    save_state(args.state_file, config_fingerprint, new_state)
+
+    duration = max(time.time() - start_time, 1e-6)
+    processed = [result for result in results if not result.skipped]
+    total_mb = sum(result.size for result in processed) / 1_000_000
+    modified_count = sum(1 for result in processed if result.modified)
+    print(f"[*] Processed {len(processed)} files ({total_mb:.1f} MB) in {duration:.2f} seconds: {len(processed) / duration:.1f} files/s, {total_mb / duration:.1f} MB/s")
+    print(f"[*] {modified_count} files were modified, {len(all_files) - len(processed)} unchanged files were skipped")
+
+
+if __name__ == "__main__":
+    main()
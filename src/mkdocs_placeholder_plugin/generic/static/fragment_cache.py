@@ -0,0 +1,58 @@
+from collections import OrderedDict
+import threading
+from typing import Callable, Optional
+# local
+from ..config import Placeholder
+
+# Large enough for the different placeholder combinations on a typical site, while keeping the memory usage low
+DEFAULT_MAX_CACHED_TABLES = 256
+
+class HtmlFragmentCache:
+    """
+    Stores HTML snippets that only depend on the configuration and not on the page they are used on.
+    Per placeholder fragments (input elements, placeholder spans, etc) are created once and kept as long as the config is used.
+    Rendered tables are stored in a LRU cache that is keyed by the (ordered) names of the placeholders in the table.
+    It can be shared between threads.
+    """
+    def __init__(self, max_cached_tables: int = DEFAULT_MAX_CACHED_TABLES) -> None:
+        # (function that creates the fragment, placeholder name) -> HTML code
+        self.fragments: dict[tuple[Callable[[Placeholder], str],str],str] = {}
+        self.tables: OrderedDict[tuple[str,...],str] = OrderedDict()
+        self.max_cached_tables = max_cached_tables
+        # Statistics to see how well the cache works for a site
+        self.table_hits = 0
+        self.table_misses = 0
+        # Reordering the LRU cache is not atomic. Fragments do not need the lock, since creating one twice results in the same value
+        self.table_lock = threading.Lock()
+
+    def get_fragment(self, create_function: Callable[[Placeholder], str], placeholder: Placeholder) -> str:
+        """
+        Returns the result of `create_function(placeholder)`. The function is only called the first time a fragment is requested
+        """
+        key = (create_function, placeholder.name)
+        fragment = self.fragments.get(key)
+        if fragment is None:
+            fragment = create_function(placeholder)
+            self.fragments[key] = fragment
+        return fragment
+
+    def get_table(self, placeholder_names: tuple[str,...]) -> Optional[str]:
+        with self.table_lock:
+            table = self.tables.get(placeholder_names)
+            if table is None:
+                self.table_misses += 1
+            else:
+                self.table_hits += 1
+                self.tables.move_to_end(placeholder_names)
+            return table
+
+    def add_table(self, placeholder_names: tuple[str,...], table: str) -> None:
+        with self.table_lock:
+            self.tables[placeholder_names] = table
+            self.tables.move_to_end(placeholder_names)
+            while len(self.tables) > self.max_cached_tables:
+                # Remove the least recently used table
+                self.tables.popitem(last=False)
+
+    def get_statistics(self) -> str:
+        return f"{len(self.fragments)} cached fragments, table cache: {self.table_hits} hits, {self.table_misses} misses, {len(self.tables)}/{self.max_cached_tables} entries"
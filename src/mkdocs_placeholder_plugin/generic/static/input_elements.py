@@ -1,17 +1,20 @@
 import html
 import re
+from typing import Optional
 # local files
 from .. import warning
 from ..config import Placeholder, InputType
 from ..html_tag_parser import ParsedHtmlTag
 from ..html_tag_handler import HtmlTagHandler
+from .fragment_cache import HtmlFragmentCache
 
 START_REGEX = re.compile("<input", re.IGNORECASE)
 
 class StaticInputElementReplacer(HtmlTagHandler):
-    def __init__(self, placeholders: dict[str,Placeholder], add_line_in_warning: bool) -> None:
+    def __init__(self, placeholders: dict[str,Placeholder], add_line_in_warning: bool, fragment_cache: Optional[HtmlFragmentCache] = None) -> None:
         super().__init__(START_REGEX, None, add_line_in_warning)
         self.placeholders = placeholders
+        self.fragment_cache = fragment_cache or HtmlFragmentCache()
 
     #@TODO: add this to normal page processing?
     def replace_function(self, tag: str, parsed: ParsedHtmlTag) -> str:
@@ -23,7 +26,7 @@ class StaticInputElementReplacer(HtmlTagHandler):
                 return f'<input value="Undefined variable {html.escape(placeholder_name)}" disabled>'
             else:
                 # Properly handle the different input element types
-                return create_input_html_with_fallback(self.placeholders[placeholder_name])
+                return self.fragment_cache.get_fragment(create_input_html_with_fallback, self.placeholders[placeholder_name])
         else:
             return tag
 
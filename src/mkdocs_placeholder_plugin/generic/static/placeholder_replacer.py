@@ -1,12 +1,16 @@
+from functools import partial
 import html
 import random
+import re
 import string
 import time
+from typing import Optional
 # local
 from ..config import PlaceholderConfig, Placeholder
+from ..token_regex import compile_token_regex, get_token_match
+from .fragment_cache import HtmlFragmentCache
 
 SAFE_CHARS_IN_MARKDOWN = list(string.ascii_letters + string.digits)
-CACHED_EXPANDED_DEFAULT_VALUES: dict[str,str] = {}
 
 def paraniod_html_escape(input: str) -> str:
     """
@@ -38,39 +42,8 @@ def get_all_placeholder_patterns(placeholder: Placeholder, config: PlaceholderCo
     ]
 
 def placeholder_expanded_default_value(placeholder: Placeholder, config: PlaceholderConfig) -> str:
-    # This speeds up the somewhat expensive operation by caching the results
-    value = CACHED_EXPANDED_DEFAULT_VALUES.get(placeholder.name)
-    if value is None:
-        value = _placeholder_expanded_default_value(placeholder, config)
-        CACHED_EXPANDED_DEFAULT_VALUES[placeholder.name] = value
-    return value
-
-def _placeholder_expanded_default_value(placeholder: Placeholder, config: PlaceholderConfig) -> str:
-    if placeholder.default_function:
-        return "<JAVASCRIPT_FUNCTION>"
-
-    default_value = placeholder.default_value
-    if placeholder.values:
-        default_value = placeholder.values[default_value]
-
-    if not placeholder.allow_nested:
-        return default_value
-    else:
-        # This works similar to safe_replace_multiple_placeholders_in_string in replacer.ts.
-        # The roundabout way is needed to ensure that placeholders that are in a previously replaced placeholder's value are not replaced
-        string = default_value
-        unique = f"{int(time.time())}_{random.randint(0, 10000)}"
-        for placeholder in config.placeholders.values():
-            for pattern in get_all_placeholder_patterns(placeholder, config):
-                string = string.replace(pattern, f"x{placeholder.name}_{unique}x")
-
-        for placeholder in config.placeholders.values():
-            pattern = f"x{placeholder.name}_{unique}x"
-            if pattern in string:
-                expanded_value = placeholder_expanded_default_value(placeholder, config)
-                string = string.replace(pattern, expanded_value)
-
-        return string
+    # Computed once when the configuration is parsed
+    return config.expanded_default_values[placeholder.name]
 
 
 class DynamicPlaceholderPreprocessor:
@@ -78,40 +51,56 @@ class DynamicPlaceholderPreprocessor:
     This class replaces dynamic placeholders with the same elements as the javascript would.
     However, if JavaScript is disabled, it will show the default value instead of the placeholder name.
     """
-    def __init__(self, config: PlaceholderConfig) -> None:
+    def __init__(self, config: PlaceholderConfig, fragment_cache: Optional[HtmlFragmentCache] = None, unique: Optional[str] = None) -> None:
         self.config = config
-        self.unique = f"{int(time.time())}_{random.randint(0, 10000)}"
-
-    def handle_markdown_page(self, page_markdown: str) -> str:
-        # Mark placeholders to replace in the Markdown, so that the automatic input tables, input replacements, etc
-
-        # This works similar to safe_replace_multiple_placeholders_in_string in replacer.ts.
-        # The roundabout way is needed to ensure that placeholders that are in a previously replaced placeholder's value are not replaced
-        for placeholder in self.config.placeholders.values():
-            # Handle explicitly marked dynamic placeholders
-            search_expression = self.config.settings.dynamic_prefix + placeholder.name + self.config.settings.dynamic_suffix
-            page_markdown = page_markdown.replace(search_expression, f"x{placeholder.name}_{self.unique}_DYNAMICx")
-
-            # Handle explicitly marked editable placeholders
-            search_expression = self.config.settings.editable_prefix + placeholder.name + self.config.settings.editable_suffix
-            page_markdown = page_markdown.replace(search_expression, f"x{placeholder.name}_{self.unique}_EDITABLEx")
-
-            # Handle normal placeholders, if they are just an alias for dynamic or editable placeholders
-            if self.config.settings.normal_is_alias_for in ["editable", "dynamic"]:
-                search_expression = self.config.settings.normal_prefix + placeholder.name + self.config.settings.normal_suffix
-                page_markdown = page_markdown.replace(search_expression, f"x{placeholder.name}_{self.unique}_{self.config.settings.normal_is_alias_for.upper()}x")
-
-        return page_markdown
+        self.fragment_cache = fragment_cache or HtmlFragmentCache()
+        # Used to create markers, that should not occur naturally in any page
+        self.unique = unique or f"{int(time.time())}_{random.randint(0, 10000)}"
+
+        # The replacement methods that are handled by this class and the marker types they are converted to
+        s = config.settings
+        modes = [("dynamic", (s.dynamic_prefix, s.dynamic_suffix), "DYNAMIC"), ("editable", (s.editable_prefix, s.editable_suffix), "EDITABLE")]
+        # Handle normal placeholders, if they are just an alias for dynamic or editable placeholders
+        if s.normal_is_alias_for in ["editable", "dynamic"]:
+            modes.append(("normal", (s.normal_prefix, s.normal_suffix), s.normal_is_alias_for.upper()))
+        modes = [mode for mode in modes if mode[0] not in s.disabled_replace_modes]
+        self.affixes = [affix for _, affix, _ in modes]
+        self.marker_types = [marker_type for _, _, marker_type in modes]
+        # Baked placeholders are replaced by BakedPlaceholderReplacer in the HTML page instead
+        names = [placeholder.name for placeholder in config.placeholders.values() if not placeholder.bake]
+        # Compiled once, so that each page only needs to be scanned a single time
+        self.markdown_token_regex = compile_token_regex(self.affixes, names)
+
+        # Matches the markers created by marker_for_token
+        marker_affixes = [("x", f"_{self.unique}_DYNAMICx"), ("x", f"_{self.unique}_EDITABLEx")]
+        self.marker_regex = compile_token_regex(marker_affixes, names)
+        # Created once, since the fragment cache uses the functions as part of its keys
+        self.marker_html_functions = [partial(html_for_dynamic_placeholder, config=config), partial(html_for_editable_placeholder, config=config)]
+        # The HTML functions for the matches of markdown_token_regex
+        self.token_html_functions = [self.marker_html_functions[0 if marker_type == "DYNAMIC" else 1] for marker_type in self.marker_types]
+
+    def marker_for_token(self, match: re.Match) -> str:
+        """
+        Returns the marker for a placeholder matched by markdown_token_regex. The marker is replaced in the HTML page by handle_html_page
+        """
+        index, name = get_token_match(match)
+        return f"x{name}_{self.unique}_{self.marker_types[index]}x"
 
     def handle_html_page(self, page_html: str) -> str:
         # needs to happen in the HTML document, since otherwise listings will screw things up
-        for placeholder in self.config.placeholders.values():
-            page_html = page_html.replace(
-                f"x{placeholder.name}_{self.unique}_DYNAMICx", html_for_dynamic_placeholder(placeholder, self.config)
-            )
-            page_html = page_html.replace(
-                f"x{placeholder.name}_{self.unique}_EDITABLEx", html_for_editable_placeholder(placeholder, self.config)
-            )
-
-        return page_html
-
+        if f"_{self.unique}_" not in page_html:
+            # Page does not contain any markers, so we can skip the work
+            return page_html
+
+        return self.marker_regex.sub(self.resolve_marker, page_html)
+
+    def resolve_marker(self, match: re.Match) -> str:
+        index, name = get_token_match(match)
+        return self.fragment_cache.get_fragment(self.marker_html_functions[index], self.config.placeholders[name])
+
+    def html_for_token(self, match: re.Match) -> str:
+        """
+        Returns the HTML for a placeholder matched by markdown_token_regex. Used to directly create the HTML while the markdown is parsed
+        """
+        index, name = get_token_match(match)
+        return self.fragment_cache.get_fragment(self.token_html_functions[index], self.config.placeholders[name])
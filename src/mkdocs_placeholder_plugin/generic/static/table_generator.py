@@ -1,11 +1,16 @@
 import html
+from typing import Optional
 # local
 from ..config import PlaceholderConfig, Placeholder, InputType
+from ..usage_index import PlaceholderUsageScanner
+from .fragment_cache import HtmlFragmentCache
 from .placeholder_replacer import get_all_placeholder_patterns
 
 class TableGenerator:
-    def __init__(self, config: PlaceholderConfig) -> None:
+    def __init__(self, config: PlaceholderConfig, fragment_cache: Optional[HtmlFragmentCache] = None) -> None:
         self.config = config
+        self.usage_scanner = PlaceholderUsageScanner(config)
+        self.fragment_cache = fragment_cache or HtmlFragmentCache()
 
     def generate_table_code(self, page_markdown: str, create_no_js_version: bool) -> str:
         # @TODO: read from config settings?
@@ -18,24 +23,24 @@ class TableGenerator:
 
         return f'<div class="auto-input-table" data-columns="{",".join(column_list)}"><noscript>{no_js_table}</noscript></div>'
 
-    def get_placeholders_for_table(self, page_markdown: str) -> list[Placeholder]:
-        directly_referenced = [placeholder for placeholder in self.config.placeholders.values()
-                if not placeholder.read_only and self.is_placeholder_on_page(placeholder, page_markdown)]
-        
-        all_used_placeholders = list(directly_referenced)
-        for placeholder in directly_referenced:
-            self.recursive_add_nested_placeholders(placeholder, all_used_placeholders)
-        return all_used_placeholders
+    def get_placeholders_for_table(self, page_markdown: str, used_placeholder_names: Optional[set[str]] = None) -> list[Placeholder]:
+        """
+        Returns the placeholders that should be shown in an input table on the given page.
+        If you already know which placeholders are used on the page (see PlaceholderUsageScanner), you can pass them to skip scanning the page again.
+        """
+        if used_placeholder_names is None:
+            used_placeholder_names = self.usage_scanner.find_used_placeholders(page_markdown)
 
-    def recursive_add_nested_placeholders(self, root_placeholder: Placeholder, all_used_placeholders: list[Placeholder]) -> None:
-        if root_placeholder not in all_used_placeholders:
-            all_used_placeholders.append(root_placeholder)
+        all_used_names = set()
+        for name in used_placeholder_names:
+            placeholder = self.config.placeholders.get(name)
+            if placeholder and not placeholder.read_only:
+                all_used_names.add(name)
+                all_used_names |= self.config.nested_placeholders[name]
 
-        if root_placeholder.allow_nested:
-            for child_placeholder in self.config.placeholders.values():
-                if child_placeholder not in all_used_placeholders \
-                    and self.is_placeholder_on_page(child_placeholder, root_placeholder.default_value):
-                        self.recursive_add_nested_placeholders(child_placeholder, all_used_placeholders)
+        # Same order as in the configuration file (and in the tables created by the JavaScript code).
+        # Baked placeholders can not be changed, so they are never shown
+        return [placeholder for placeholder in self.config.placeholders.values() if placeholder.name in all_used_names and not placeholder.bake]
 
     def is_placeholder_on_page(self, placeholder: Placeholder, page_markdown: str) -> bool:
         for pattern in get_all_placeholder_patterns(placeholder, self.config):
@@ -49,17 +54,25 @@ class TableGenerator:
     def generate_table_html(self, placeholder_list: list[Placeholder], column_list: list[str]) -> str:
         if not placeholder_list:
             return ""
-        
+
+        # Many pages use the same placeholders, so the resulting table is often the same
+        cache_key = tuple(placeholder.name for placeholder in placeholder_list)
+        cached_table = self.fragment_cache.get_table(cache_key)
+        if cached_table is not None:
+            return cached_table
+
         #@TODO: actually handle the passed columns? Would be more complicated but also more consistent
         rows = []
         for placeholder in placeholder_list:
             description_or_name = placeholder.description if placeholder.description else placeholder.name
-            input_element = create_disabled_input_html(placeholder)
+            input_element = self.fragment_cache.get_fragment(create_disabled_input_html, placeholder)
             rows.append(f"<tr><td>{html.escape(description_or_name)}</td><td>{input_element}</td></tr>")
 
         table_header = "<thead><tr><th>Description / name</th><th>Input element</th></tr></thead>"
         table_body = f"<tbody>{''.join(rows)}</tbody>"
-        return f"<table>{table_header}{table_body}</table>"
+        table = f"<table>{table_header}{table_body}</table>"
+        self.fragment_cache.add_table(cache_key, table)
+        return table
 
 
 def create_disabled_input_html(placeholder: Placeholder) -> str:
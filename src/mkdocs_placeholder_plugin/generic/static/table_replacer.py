@@ -1,17 +1,24 @@
 import re
+from typing import Optional
 # local
 from ..config import PlaceholderConfig
 from ..html_tag_parser import ParsedHtmlTag
 from ..html_tag_handler import HtmlTagHandler
 from .table_generator import TableGenerator
+from .fragment_cache import HtmlFragmentCache
 
 START_REGEX = re.compile(r'<div\s[^>]*class="?[^"]*auto-input-table', re.IGNORECASE)
 END_REGEX = re.compile(r'\s*</div>', re.IGNORECASE)
 
 class StaticHtmlElementTableFallbackReplacer(HtmlTagHandler):
-    def __init__(self, config: PlaceholderConfig, add_line_in_warning: bool) -> None:
+    def __init__(self, config: PlaceholderConfig, add_line_in_warning: bool, fragment_cache: Optional[HtmlFragmentCache] = None) -> None:
         super().__init__(START_REGEX, END_REGEX, add_line_in_warning)
-        self.table_generator = TableGenerator(config)
+        self.table_generator = TableGenerator(config, fragment_cache)
+        # All tables on a page show the same placeholders, so the page only needs to be scanned once
+        self.indexed_text: Optional[str] = None
+        self.used_placeholder_names: set[str] = set()
+        # Set this, if the handler only sees parts of the page at once (see StreamingPageProcessor)
+        self.page_used_placeholder_names: Optional[set[str]] = None
 
     def replace_function(self, tag: str, parsed: ParsedHtmlTag) -> str:
         """
@@ -20,9 +27,16 @@ class StaticHtmlElementTableFallbackReplacer(HtmlTagHandler):
         """
         class_names = parsed.attributes.get("class", "").split()
         if "auto-input-table" in class_names:
-            used_placeholders = self.table_generator.get_placeholders_for_table(self.full_text_string)
+            used_placeholders = self.table_generator.get_placeholders_for_table(self.full_text_string, self.get_used_placeholder_names())
             no_js_table = self.table_generator.generate_table_html(used_placeholders, ["TODO: add if it is used in the future"])
             return tag + no_js_table
         else:
             return tag
 
+    def get_used_placeholder_names(self) -> set[str]:
+        if self.page_used_placeholder_names is not None:
+            return self.page_used_placeholder_names
+        if self.indexed_text is not self.full_text_string:
+            self.used_placeholder_names = self.table_generator.usage_scanner.find_used_placeholders(self.full_text_string)
+            self.indexed_text = self.full_text_string
+        return self.used_placeholder_names
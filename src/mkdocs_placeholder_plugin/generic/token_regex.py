@@ -0,0 +1,70 @@
+from bisect import bisect_left
+import re
+from typing import Iterable
+
+
+def build_name_regex(names: Iterable[str]) -> str:
+    """
+    Build a regular expression (as string) that matches exactly one of the given placeholder names.
+    The names are arranged as a trie, so that the regex engine only has to follow a single path instead of trying every name at every position.
+    Longer names are preferred over shorter ones, if both match at the same position.
+    """
+    trie: dict = {}
+    for name in names:
+        node = trie
+        for char in name:
+            node = node.setdefault(char, {})
+        # The empty string marks, that a name ends at this node
+        node[""] = {}
+
+    if not trie:
+        # Nothing should ever match
+        return "(?!)"
+    return _trie_to_regex(trie)
+
+
+def _trie_to_regex(node: dict) -> str:
+    branches = [re.escape(char) + _trie_to_regex(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+
+    body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+    if "" in node:
+        # A name ends here, but a longer name may continue. The greedy '?' tries the longer name first
+        return f"(?:{body})?" if len(branches) == 1 else f"{body}?"
+    else:
+        return body
+
+
+def compile_token_regex(affixes: list[tuple[str,str]], names: Iterable[str]) -> re.Pattern:
+    """
+    Compile a regex that matches `prefix + NAME + suffix` for any of the given (prefix, suffix) pairs and any of the given placeholder names.
+    The name is captured in the group `g<index>`, where index is the position of the matching pair in `affixes`.
+    Use `get_token_match` to get both values from a match.
+    """
+    name_regex = build_name_regex(names)
+    alternatives = [f"{re.escape(prefix)}(?P<g{index}>{name_regex}){re.escape(suffix)}"
+                    for index, (prefix, suffix) in enumerate(affixes)]
+    return re.compile("|".join(alternatives) if alternatives else "(?!)")
+
+
+def get_token_match(match: re.Match) -> tuple[int,str]:
+    """
+    Returns the index of the (prefix, suffix) pair that matched and the name of the placeholder
+    """
+    group_name = match.lastgroup
+    if group_name is None:
+        raise Exception("[Internal error] Match was not created by a regex from compile_token_regex")
+    return int(group_name[1:]), match[group_name]
+
+
+def is_start_of_other_name(name: str, start: str, sorted_names: list[str]) -> bool:
+    """
+    Returns whether any name in `sorted_names` (except `name` itself) starts with `start`
+    """
+    index = bisect_left(sorted_names, start)
+    while index < len(sorted_names) and sorted_names[index].startswith(start):
+        if sorted_names[index] != name:
+            return True
+        index += 1
+    return False
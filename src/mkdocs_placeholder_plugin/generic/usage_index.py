@@ -0,0 +1,53 @@
+import re
+# local
+from .config import PlaceholderConfig
+from .token_regex import compile_token_regex, get_token_match, is_start_of_other_name
+
+
+class PlaceholderUsageScanner:
+    """
+    Determines which placeholders are used in a text.
+    A placeholder counts as used, if it is referenced with any enabled replace mode (xNAMEx, sNAMEs, etc) or by an already preprocessed element (data-placeholder="NAME").
+    The regexes are compiled once per config, so the costs of a scan do not depend on the number of placeholders.
+    """
+    def __init__(self, config: PlaceholderConfig) -> None:
+        s = config.settings
+        modes = [
+            ("editable", (s.editable_prefix, s.editable_suffix)),
+            ("dynamic", (s.dynamic_prefix, s.dynamic_suffix)),
+            ("html", (s.html_prefix, s.html_suffix)),
+            ("normal", (s.normal_prefix, s.normal_suffix)),
+            ("static", (s.static_prefix, s.static_suffix)),
+        ]
+        affixes = [affix for mode, affix in modes if mode not in s.disabled_replace_modes]
+        # Already preprocessed element that will use the placeholder via the dynamic replacement method
+        # Looks like this: <span class="placeholder-value" data-placeholder="DEMO_FILENAME">file_to_transfer.txtp</span>
+        affixes.append(('data-placeholder="', '"'))
+        names = sorted(config.placeholders)
+        # One regex per replace mode. Python's regex engine can skip ahead to the prefix, which is much faster than one combined regex
+        self.regexes: list[re.Pattern] = [compile_token_regex([affix], names) for affix in affixes]
+
+        # The regex only reports one name per position and prefers longer names.
+        # So if NAME and NAMExOTHER exist, xNAMEx would not be found in xNAMExOTHERx. These rare cases are checked separately
+        self.shadowed_patterns: list[tuple[str,str]] = [(name, prefix + name + suffix)
+                                                        for prefix, suffix in affixes for name in names
+                                                        if is_start_of_other_name(name, name + suffix, names)]
+
+    def find_used_placeholders(self, text: str) -> set[str]:
+        """
+        Returns the names of all placeholders that are used in the given text
+        """
+        used_names = set()
+        for regex in self.regexes:
+            search_start_pos = 0
+            while match := regex.search(text, search_start_pos):
+                used_names.add(get_token_match(match)[1])
+                # Matches may overlap (for example xAxBx), so we continue directly after the start of the match
+                search_start_pos = match.start() + 1
+
+        for name, pattern in self.shadowed_patterns:
+            if name not in used_names and pattern in text:
+                used_names.add(name)
+
+        return used_names
+
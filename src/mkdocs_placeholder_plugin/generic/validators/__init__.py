@@ -1,4 +1,4 @@
-from typing import NamedTuple
+from typing import NamedTuple, Optional
 import re
 # local
 from .. import warning, PlaceholderConfigError
@@ -8,6 +8,8 @@ class ValidatorRule(NamedTuple):
     severity: str # warn or error
     # you need to either specify regex_string or match_function
     regex_string: str
+    # Compiled once when the rule is created, so that invalid regular expressions are reported when the config is loaded
+    regex: Optional[re.Pattern]
     match_function: str
     should_match: bool
     error_message: str
@@ -31,10 +33,15 @@ class Validator:
         self.name = name
         self.rules = rules
         self._is_used = False
+        # Value -> results. Many placeholders share the same validators and default values
+        self._results: dict[str,ValidationResults] = {}
 
     def mark_used(self) -> None:
         self._is_used = True
 
+    def mark_unused(self) -> None:
+        self._is_used = False
+
     def is_used(self) -> bool:
         return self._is_used
 
@@ -61,6 +68,7 @@ def should_match(regex_string: str, error_message: str) -> ValidatorRule:
     return ValidatorRule(
         severity="warn",
         regex_string=regex_string,
+        regex=re.compile(regex_string),
         match_function="",
         should_match=True,
         error_message=error_message,
@@ -70,6 +78,7 @@ def should_not_match(regex_string: str, error_message: str) -> ValidatorRule:
     return ValidatorRule(
         severity="warn",
         regex_string=regex_string,
+        regex=re.compile(regex_string),
         match_function="",
         should_match=False,
         error_message=error_message,
@@ -79,6 +88,7 @@ def must_match(regex_string: str, error_message: str) -> ValidatorRule:
     return ValidatorRule(
         severity="error",
         regex_string=regex_string,
+        regex=re.compile(regex_string),
         match_function="",
         should_match=True,
         error_message=error_message,
@@ -88,6 +98,7 @@ def must_not_match(regex_string: str, error_message: str) -> ValidatorRule:
     return ValidatorRule(
         severity="error",
         regex_string=regex_string,
+        regex=re.compile(regex_string),
         match_function="",
         should_match=False,
         error_message=error_message,
@@ -107,36 +118,40 @@ class ValidationResults(NamedTuple):
 
 
 def convert_to_proper_validators(pre_validator_map: dict[str,PreValidator]) -> dict[str,Validator]:
+    # Validator id -> all rules, including the imported ones. Validators that are imported multiple times are only resolved once
+    resolved_rules: dict[str,list[ValidatorRule]] = {}
     result = {}
     for id, pv in pre_validator_map.items():
-        rules = pv.rules
-        if pv.import_rules_from_ids:
-            # @TODO: This implementation should just ignore dependency loops. Not sure if this is good without a warning...
-            validators_to_include: dict[str,PreValidator] = {}
-            _recursive_validator_include(pre_validator_map, validators_to_include, pv)
-            
-            rules = []
-            for v in validators_to_include.values():
-                rules += v.rules
-
-            # print(pv.id, list(pv.import_rules_from_ids), list(validators_to_include)) # for debugging
-
-            # remove duplicate rules if they exist
-            rules = list(set(rules))
+        rules = _resolve_validator_rules(pre_validator_map, resolved_rules, [], pv)
         result[id] = Validator(pv.id, pv.name, rules)
     return result
 
-def _recursive_validator_include(pre_validator_map: dict[str,PreValidator], visited: dict[str,PreValidator], root: PreValidator) -> None:
+def _resolve_validator_rules(pre_validator_map: dict[str,PreValidator], resolved_rules: dict[str,list[ValidatorRule]], import_stack: list[str], root: PreValidator) -> list[ValidatorRule]:
     """
-    Recursively visits child nodes. All visited nodes are stored in the `visited` parameter
+    Returns the validator's own rules followed by the rules of the imported validators (in the order they are listed).
+    Duplicate rules are only kept at their first position, so the order is the same in every build.
+    The results are stored in `resolved_rules`, `import_stack` contains the validators that are currently being resolved
     """
-    visited[root.id] = root
-    for child_id in root.import_rules_from_ids:
-        if child_id not in visited:
+    if root.id in resolved_rules:
+        return resolved_rules[root.id]
+    if root.id in import_stack:
+        cycle = import_stack[import_stack.index(root.id):] + [root.id]
+        raise PlaceholderConfigError(f"Validators import each other's rules in a loop: {' -> '.join(cycle)}")
+
+    rules = list(root.rules)
+    if root.import_rules_from_ids:
+        import_stack.append(root.id)
+        for child_id in root.import_rules_from_ids:
             if child := pre_validator_map.get(child_id):
-                _recursive_validator_include(pre_validator_map, visited, child)
+                rules += _resolve_validator_rules(pre_validator_map, resolved_rules, import_stack, child)
             else:
                 raise PlaceholderConfigError(f"Validator '{root.id}' has a reference to the unknown validator '{child_id}'")
+        import_stack.pop()
+        # remove duplicate rules if they exist
+        rules = list(dict.fromkeys(rules))
+
+    resolved_rules[root.id] = rules
+    return rules
 
 def assert_matches_one_validator(validators: list[Validator], value: str) -> None:
     if not validators:
@@ -170,15 +185,14 @@ def assert_matches_one_validator(validators: list[Validator], value: str) -> Non
 
 
 def check_if_matches_validator(validator: Validator, default_value: str) -> ValidationResults:
+    if cached := validator._results.get(default_value):
+        return cached
+
     warnings = []
     errors = []
     for rule in validator.rules:
-        if rule.regex_string:
-            try:
-                matches = bool(re.search(rule.regex_string, default_value))
-            except Exception as ex:
-                raise PlaceholderConfigError(f"Error in regular expression '{rule.regex_string}': {ex}")
-
+        if rule.regex:
+            matches = bool(rule.regex.search(default_value))
             if matches != rule.should_match:
                 # This rule fails
                 if rule.severity == "error":
@@ -192,11 +206,13 @@ def check_if_matches_validator(validator: Validator, default_value: str) -> Vali
             # Do we just assume that everything is ok.
             pass
 
-    return ValidationResults(
+    results = ValidationResults(
         validator_name=validator.name,
         value=default_value,
         warnings=warnings,
         errors=errors,
     )
+    validator._results[default_value] = results
+    return results
 
 MUST_NOT_BE_EMPTY = must_not_match("^$", "Can not be empty")
@@ -0,0 +1,118 @@
+import re
+from typing import Any, Callable, Optional
+import xml.etree.ElementTree as etree
+# pip dependency
+from markdown import Markdown
+from markdown.extensions import Extension
+from markdown.inlinepatterns import InlineProcessor
+from markdown.treeprocessors import Treeprocessor
+from markdown.util import AtomicString
+# local
+from ..generic.static.placeholder_replacer import DynamicPlaceholderPreprocessor
+
+# Lower than the inline HTML pattern (90), so that inline HTML tags are stashed before this pattern could insert HTML into their attributes.
+# The placeholders in the stashed tags are then replaced by PlaceholderCodeProcessor like in all other raw HTML.
+# Higher than the emphasis patterns, so that placeholder names with underscores are not split up
+PLACEHOLDER_PATTERN_PRIORITY = 85
+# Needs to run after the inline patterns (20), so that inline code elements already exist
+CODE_PROCESSOR_PRIORITY = 15
+# Used while the fallback is disabled for the current page
+NEVER_MATCHING_REGEX = re.compile("(?!)")
+
+
+class PlaceholderInlineProcessor(InlineProcessor):
+    """
+    Replaces dynamic and editable placeholders with the same elements as the JavaScript code would, but shows their default values.
+    Python-Markdown does not apply inline patterns to code, link URLs, or raw HTML. Code and raw HTML are handled by PlaceholderCodeProcessor.
+    """
+    def __init__(self, extension: "PlaceholderMarkdownExtension", md: Markdown) -> None:
+        # The actual regex is returned by getCompiledRegExp
+        super().__init__(NEVER_MATCHING_REGEX.pattern, md)
+        self.extension = extension
+
+    def getCompiledRegExp(self) -> re.Pattern:
+        # The enabled replace modes can differ between pages
+        preprocessor = self.extension.preprocessor
+        return preprocessor.markdown_token_regex if preprocessor else NEVER_MATCHING_REGEX
+
+    def handleMatch(self, m: re.Match, data: str) -> tuple[Any,int,int]:
+        return self.extension.store_placeholder_html(m), m.start(0), m.end(0)
+
+
+class PlaceholderCodeProcessor(Treeprocessor):
+    """
+    Replaces the placeholders in code (inline code, code blocks, and listings stored as raw HTML) and other raw HTML.
+    This keeps the behavior of the old approach, where placeholders were replaced everywhere in the HTML document
+    """
+    def __init__(self, extension: "PlaceholderMarkdownExtension", md: Markdown) -> None:
+        super().__init__(md)
+        self.extension = extension
+
+    def run(self, root: etree.Element) -> None:
+        preprocessor = self.extension.preprocessor
+        if not preprocessor or not preprocessor.affixes:
+            # Nothing to replace on this page
+            return
+
+        token_regex = preprocessor.markdown_token_regex
+        for element in root.iter("code"):
+            if element.text and token_regex.search(element.text):
+                # The placeholders in the stash are inserted as is, so they are not escaped like the rest of the code
+                element.text = AtomicString(token_regex.sub(self.extension.store_placeholder_html, element.text))
+
+        # Fenced code blocks (and raw HTML) are stored in the stash by the preprocessors.
+        # The HTML that we stored ourselves already contains the resolved placeholders, so it needs to be skipped
+        raw_html_blocks = self.md.htmlStash.rawHtmlBlocks
+        for index in range(len(raw_html_blocks)):
+            block = raw_html_blocks[index]
+            if index not in self.extension.own_stash_indices and isinstance(block, str):
+                raw_html_blocks[index] = token_regex.sub(self.extension.get_token_function(), block)
+
+
+class PlaceholderMarkdownExtension(Extension):
+    """
+    Creates the no JavaScript fallback for dynamic and editable placeholders while the markdown is parsed.
+    This replaces DynamicPlaceholderPreprocessor's markers, that needed two extra passes over each page.
+    """
+    def __init__(self, preprocessor: DynamicPlaceholderPreprocessor, use_markers: bool = False, **kwargs) -> None:
+        """
+        If `use_markers` is set, the placeholders are replaced with the preprocessor's markers instead of the final HTML.
+        The markers can then be resolved with different placeholder values (see variants.py)
+        """
+        super().__init__(**kwargs)
+        # Can be changed for each page with set_preprocessor
+        self.preprocessor: Optional[DynamicPlaceholderPreprocessor] = preprocessor
+        self.use_markers = use_markers
+        # The indices of the stash entries created by this extension for the current document
+        self.own_stash_indices: set[int] = set()
+
+    def extendMarkdown(self, md: Markdown) -> None:
+        self.md = md
+        md.registerExtension(self)
+        md.inlinePatterns.register(PlaceholderInlineProcessor(self, md), "placeholder", PLACEHOLDER_PATTERN_PRIORITY)
+        md.treeprocessors.register(PlaceholderCodeProcessor(self, md), "placeholder_code", CODE_PROCESSOR_PRIORITY)
+
+    def reset(self) -> None:
+        self.own_stash_indices = set()
+
+    def set_preprocessor(self, preprocessor: Optional[DynamicPlaceholderPreprocessor]) -> None:
+        """
+        Sets the preprocessor for the next page to parse. Use None, if the page should not have a fallback
+        """
+        self.preprocessor = preprocessor
+
+    def get_token_function(self) -> Callable[[re.Match],str]:
+        """
+        Returns the function, that creates the replacement (HTML or marker) for a placeholder matched by the preprocessor's markdown_token_regex
+        """
+        if self.preprocessor is None:
+            raise Exception("[Internal error] Placeholder matched, while the fallback is disabled for the page")
+        return self.preprocessor.marker_for_token if self.use_markers else self.preprocessor.html_for_token
+
+    def store_placeholder_html(self, match: re.Match) -> str:
+        """
+        Stores the HTML for the matched placeholder in the stash, so that it is inserted into the page as is
+        """
+        replacement = self.get_token_function()(match)
+        self.own_stash_indices.add(self.md.htmlStash.html_counter)
+        return self.md.htmlStash.store(replacement)
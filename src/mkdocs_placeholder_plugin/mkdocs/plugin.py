@@ -1,15 +1,26 @@
 from functools import wraps
+import os
 import traceback
-from typing import Callable
+from typing import Callable, Optional
 # pip dependency
 from mkdocs.config.defaults import MkDocsConfig
-from mkdocs.plugins import BasePlugin
+from mkdocs.plugins import BasePlugin, event_priority
 from mkdocs.exceptions import PluginError
 # local files
 from .plugin_config import PlaceholderPluginConfig
-from ..generic import warning, PlaceholderConfigError, PlaceholderPageError
+from ..generic import debug, warning, PlaceholderConfigError, PlaceholderPageError
+from ..generic.config.configuration import parse_page_settings
+from ..generic.config.parser_utils import get_dict
 from ..generic.page_processor import PageProcessor
+from ..generic.page_cache import PageCache, get_config_fingerprint
+from .markdown_extension import PlaceholderMarkdownExtension
 from .utils import initialize_plugin, copy_assets_to_mkdocs_site_directory
+from .variants import BuildVariant, VariantPage, parse_variants, build_variants, resolve_markers_in_output, resolve_markers_in_site
+
+# The key in a page's front matter, that contains the page specific settings
+PAGE_SETTINGS_KEY = "placeholder"
+# Tells the JavaScript code, which replace modes are disabled on the page
+PAGE_SETTINGS_ELEMENT = '<div hidden data-placeholder-disabled-replace-modes="{}"></div>'
 
 
 def convert_exceptions(function: Callable) -> Callable:
@@ -38,18 +49,47 @@ class PlaceholderPlugin(BasePlugin[PlaceholderPluginConfig]):
         """
         if self.config.enabled:
             self.configuration = initialize_plugin(config, self.config)
-            self.page_processor = PageProcessor(self.configuration)
+            fingerprint = get_config_fingerprint(self.configuration)
+            if self.config.page_cache:
+                self.page_cache: Optional[PageCache] = PageCache(self.config.page_cache_dir, fingerprint, self.config.page_cache_max_size_mb * 1_000_000)
+            else:
+                self.page_cache = None
+            # The markers end up in the pages (and heading ids) when variants are used, so they should not change between builds
+            self.page_processor = PageProcessor(self.configuration, fingerprint[:16])
+
+            # The variants reuse the rendered pages, so the pages need to contain markers instead of the resolved placeholders
+            self.variants: list[BuildVariant] = parse_variants(config, self.config, self.page_processor)
+            self.variant_pages: dict[str,VariantPage] = {}
+
+            self.markdown_extension: Optional[PlaceholderMarkdownExtension] = None
+            if self.configuration.settings.create_no_js_fallback:
+                # Dynamic and editable placeholders are replaced while the markdown is parsed
+                self.markdown_extension = PlaceholderMarkdownExtension(self.page_processor.dynamic_placeholder_preprocessor, use_markers=bool(self.variants))
+                config.markdown_extensions.append(self.markdown_extension)
 
         return config
 
+    def get_page_processor(self, page) -> PageProcessor:
+        """
+        Returns the PageProcessor for the settings in the page's front matter
+        """
+        page_settings_data = get_dict(page.meta, PAGE_SETTINGS_KEY, default={})
+        if not page_settings_data:
+            return self.page_processor
+
+        settings = parse_page_settings(page_settings_data, f"{page.file.src_path}:{PAGE_SETTINGS_KEY}", self.configuration.settings)
+        return self.page_processor.for_settings(settings)
+
     @convert_exceptions
     def on_page_markdown(self, markdown: str, page, config: MkDocsConfig, files) -> str:
         """
         The page_markdown event is called after the page's markdown is loaded from file and can be used to alter the Markdown source text. The metadata has been stripped off and is available as page.meta at this point.
         See: https://www.mkdocs.org/dev-guide/plugins/#on_page_markdown
         """
-        if self.config.enabled:
-            markdown = self.page_processor.process_page_markdown(markdown)
+        if self.config.enabled and self.markdown_extension:
+            page_processor = self.get_page_processor(page)
+            preprocessor = page_processor.dynamic_placeholder_preprocessor if page_processor.generate_fallback else None
+            self.markdown_extension.set_preprocessor(preprocessor)
 
         return markdown
 
@@ -59,11 +99,47 @@ class PlaceholderPlugin(BasePlugin[PlaceholderPluginConfig]):
         The page_content event is called after the Markdown text is rendered to HTML (but before being passed to a template) and can be used to alter the HTML body of the page.
         """
         if self.config.enabled:
-            html = self.page_processor.process_page_html(page.file.src_path, html)
+            file_path = page.file.src_path
+            page_processor = self.get_page_processor(page)
+            content = html
+            # With variants the markers stay in the content, so that other plugins (like search) see them. They are resolved in on_post_page and on_post_build
+            resolve_markers = not self.variants
+            if self.page_cache:
+                # The page's settings are not part of the HTML, so they need to be part of the cache key
+                step = "html" if page_processor is self.page_processor else f"html {page_processor.config.settings!r}"
+                if not resolve_markers:
+                    step += " markers"
+                html = self.page_cache.get_or_create(step, file_path, html, lambda text: page_processor.process_page_html(file_path, text, resolve_markers))
+            else:
+                html = page_processor.process_page_html(file_path, html, resolve_markers)
+
+            if self.variants:
+                # The output is added in on_post_page
+                page_settings_data = get_dict(page.meta, PAGE_SETTINGS_KEY, default={})
+                self.variant_pages[file_path] = VariantPage(file_path, page.file.dest_path, page_settings_data, content, html, "")
+
+            disabled_replace_modes = page_processor.config.settings.disabled_replace_modes
+            if disabled_replace_modes != self.configuration.settings.disabled_replace_modes:
+                html = PAGE_SETTINGS_ELEMENT.format(",".join(disabled_replace_modes)) + html
 
         return html
 
+    @convert_exceptions
+    def on_post_page(self, output: str, page, config: MkDocsConfig) -> str:
+        """
+        The post_page event is called after the template is rendered, but before it is written to disc and can be used to alter the output of the page.
+        """
+        if self.config.enabled and self.variants:
+            variant_page = self.variant_pages.get(page.file.src_path)
+            if variant_page:
+                self.variant_pages[page.file.src_path] = variant_page._replace(output=output)
+            # The theme may show the markers outside of the content, for example in the table of contents
+            output = resolve_markers_in_output(self.get_page_processor(page), output)
+
+        return output
 
+    # Runs after the other plugins, since they may write files containing the markers (like the search index)
+    @event_priority(-100)
     @convert_exceptions
     def on_post_build(self, config: MkDocsConfig) -> None:
         """
@@ -71,4 +147,13 @@ class PlaceholderPlugin(BasePlugin[PlaceholderPluginConfig]):
         """
         if self.config.enabled:
             copy_assets_to_mkdocs_site_directory(config, self.config, self.configuration)
+            if self.variants:
+                # Copies the site, so the main placeholder file's assets need to be written first
+                build_variants(config.site_dir, self.config, self.variants, list(self.variant_pages.values()), PAGE_SETTINGS_KEY)
+                variant_root_dirs = {variant.output_dir.split(os.sep)[0] for variant in self.variants}
+                resolve_markers_in_site(config.site_dir, self.page_processor, variant_root_dirs)
+            debug(f"HTML fragment cache: {self.page_processor.fragment_cache.get_statistics()}")
+            debug(f"Page processor: {self.page_processor.get_statistics()}")
+            if self.page_cache:
+                self.page_cache.evict()
 
@@ -16,3 +16,10 @@ class PlaceholderPluginConfig(Config):
     placeholder_extra_js = Type(str, default="")
     # The file where you define the placeholders
     placeholder_file = Type(str, default="placeholder-plugin.yaml")
+    # Store the processed pages on disk, so that unchanged pages do not need to be processed again in the next build
+    page_cache = Type(bool, default=False)
+    page_cache_dir = Type(str, default=".cache/placeholder")
+    # Least recently used entries are removed after each build, if the cache is larger than this
+    page_cache_max_size_mb = Type(int, default=100)
+    # Additional versions of the site, that use other placeholder files. Each entry needs a 'placeholder_file' and an 'output_dir' (relative to the site directory)
+    variants = Type(list, default=[])
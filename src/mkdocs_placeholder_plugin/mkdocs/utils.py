@@ -1,5 +1,7 @@
+import glob
 import logging
 import os
+from typing import Optional
 # pip dependency
 from mkdocs.config.defaults import MkDocsConfig
 from mkdocs.exceptions import PluginError
@@ -9,7 +11,8 @@ from ..generic import set_logger
 from ..generic.config import PlaceholderConfig
 from .style import generate_mkdocs_style_sheet
 from .plugin_config import PlaceholderPluginConfig
-from ..generic.config.configuration import parse_configuration_file
+from ..generic.config_catalog import parse_configuration_catalog
+from ..generic.config_snapshot import parse_configuration_file_with_snapshot
 from ..assets import copy_assets_to_directory_debuggable, copy_assets_to_directory_combined, COMBINED_FILE_NAME, DEBUGGABLE_CODE_FILE_NAME, DEBUGGABLE_DATA_FILE_NAME
 from ..generic import set_warnings_enabled
 
@@ -43,19 +46,47 @@ def register_asset_files(mkdocs_config: MkDocsConfig, plugin_config: Placeholder
         add_to_list_if_not_already_exists(mkdocs_config.extra_css, plugin_config.placeholder_css)
 
 
-def find_and_parse_configuration_file(mkdocs_config: MkDocsConfig, plugin_config: PlaceholderPluginConfig) -> PlaceholderConfig:
-    if os.path.exists(plugin_config.placeholder_file):
+def find_and_parse_configuration_file(mkdocs_config: MkDocsConfig, plugin_config: PlaceholderPluginConfig, placeholder_file: Optional[str] = None) -> PlaceholderConfig:
+    """
+    Parses the given placeholder file (by default `plugin_config.placeholder_file`).
+    It can also be a directory or glob pattern, in which case all matching YAML files are merged.
+    The validated config is reused, if the file(s) did not change since the last build
+    """
+    placeholder_file = placeholder_file or plugin_config.placeholder_file
+    # Stored next to the page cache, so that it is limited by the same size limit
+    snapshot_dir = plugin_config.page_cache_dir if plugin_config.page_cache else None
+
+    if any(character in placeholder_file for character in "*?["):
+        paths = sorted(glob.glob(placeholder_file, recursive=True))
+        if not paths:
+            # Same fallback as in resolve_file_path
+            config_dir_pattern = os.path.join(os.path.dirname(mkdocs_config.config_file_path), placeholder_file)
+            paths = sorted(glob.glob(config_dir_pattern, recursive=True))
+        if not paths:
+            raise PluginError(f"The pattern '{placeholder_file}' does not match any files either relatively to the current working directory or to the configuration file")
+        return parse_configuration_catalog(paths, placeholder_file, snapshot_dir)
+
+    path = resolve_file_path(mkdocs_config, placeholder_file)
+    if os.path.isdir(path):
+        paths = sorted(glob.glob(os.path.join(path, "**", "*.yaml"), recursive=True) + glob.glob(os.path.join(path, "**", "*.yml"), recursive=True))
+        return parse_configuration_catalog(paths, path, snapshot_dir)
+    else:
+        return parse_configuration_file_with_snapshot(path, snapshot_dir)
+
+
+def resolve_file_path(mkdocs_config: MkDocsConfig, path: str) -> str:
+    if os.path.exists(path):
         # Default to resolving paths relative to the current working directory
-        return parse_configuration_file(plugin_config.placeholder_file)
+        return path
     else:
         # If the above fails, look up relative to the configuration file. Useful if you do something like the following:
         # $ mkdocs gh-deploy --config-file ../my-project/mkdocs.yml --remote-branch master
         # Which is currently the recommended way to deploy with gitlab pages (as user page). SEE https://www.mkdocs.org/user-guide/deploying-your-docs/
-        config_path = os.path.join(os.path.dirname(mkdocs_config.config_file_path), plugin_config.placeholder_file)
+        config_path = os.path.join(os.path.dirname(mkdocs_config.config_file_path), path)
         if os.path.exists(config_path):
-            return parse_configuration_file(config_path)
+            return config_path
         else:
-            raise PluginError(f"Could not resolve the file '{plugin_config.placeholder_file}' either relatively to the current working directory or to the configuration file")
+            raise PluginError(f"Could not resolve the file '{path}' either relatively to the current working directory or to the configuration file")
 
 
 def add_to_list_if_not_already_exists(the_list: list[str], value: str):
@@ -80,12 +111,17 @@ def copy_assets_to_mkdocs_site_directory(mkdocs_config: MkDocsConfig, plugin_con
         css_text = generate_mkdocs_style_sheet(theme_name, placeholder_config.settings.debug_javascript)
         _write_to_file(mkdocs_config, plugin_config.placeholder_css, css_text, "a")
 
-    # Add extra JS
-    output_directory = os.path.join(mkdocs_config.site_dir, plugin_config.js_output_dir)
+    copy_javascript_to_directory(mkdocs_config.site_dir, plugin_config, placeholder_config)
+
+
+def copy_javascript_to_directory(site_dir: str, plugin_config: PlaceholderPluginConfig, placeholder_config: PlaceholderConfig):
+    """
+    Writes the JavaScript code and the placeholder data to the site in `site_dir`
+    """
+    output_directory = os.path.join(site_dir, plugin_config.js_output_dir)
     extra_js = plugin_config.placeholder_extra_js if plugin_config.placeholder_extra_js else None
 
     if placeholder_config.settings.debug_javascript:
         copy_assets_to_directory_debuggable(placeholder_config, output_directory, extra_js)
     else:
         copy_assets_to_directory_combined(placeholder_config, output_directory, extra_js)
-
@@ -0,0 +1,201 @@
+import html
+import json
+import os
+import re
+import shutil
+from typing import NamedTuple
+# pip dependency
+from mkdocs.config.defaults import MkDocsConfig
+from mkdocs.exceptions import PluginError
+# local
+from ..generic import debug, warning, PlaceholderConfigError
+from ..generic.config import PlaceholderConfig
+from ..generic.config.configuration import parse_page_settings
+from ..generic.page_processor import PageProcessor, PageProcessorPool
+from ..generic.token_regex import get_token_match
+from .plugin_config import PlaceholderPluginConfig
+from .utils import find_and_parse_configuration_file, copy_javascript_to_directory
+
+
+# Below this number of pages (of all variants together) starting the worker processes takes longer than processing the pages directly
+MIN_PAGES_FOR_WORKER_PROCESSES = 200
+
+
+class BuildVariant(NamedTuple):
+    output_dir: str
+    config: PlaceholderConfig
+    page_processor: PageProcessor
+
+
+class VariantPage(NamedTuple):
+    """
+    The data needed to create a page of the variants, without rendering it again
+    """
+    file_path: str
+    dest_path: str
+    # The page's front matter settings (see parse_page_settings)
+    page_settings_data: dict
+    # The content before it was processed, still containing the markers
+    content: str
+    # The content processed with the main placeholder file (without the page settings element), still containing the markers
+    processed_content: str
+    # The full page (including the theme) before the markers outside of the content were resolved
+    output: str
+
+
+def parse_variants(mkdocs_config: MkDocsConfig, plugin_config: PlaceholderPluginConfig, main_page_processor: PageProcessor) -> list[BuildVariant]:
+    """
+    Parses the placeholder files of all variants. Their PageProcessors use the same markers as `main_page_processor`
+    """
+    main_config = main_page_processor.config
+    variants: list[BuildVariant] = []
+    for index, entry in enumerate(plugin_config.variants):
+        location = f"variants[{index}]"
+        if type(entry) != dict or set(entry.keys()) != {"placeholder_file", "output_dir"}:
+            raise PluginError(f"{location}: Expected a dictionary with the keys 'placeholder_file' and 'output_dir', but got {entry}")
+
+        output_dir = os.path.normpath(str(entry["output_dir"]))
+        if os.path.isabs(output_dir) or output_dir.split(os.sep)[0] in [".", ".."]:
+            raise PluginError(f"{location}: 'output_dir' needs to be a subdirectory of the site directory, but is '{entry['output_dir']}'")
+
+        config_path = str(entry["placeholder_file"])
+        config = find_and_parse_configuration_file(mkdocs_config, plugin_config, config_path)
+        # The pages are only rendered once, so everything that affects the rendering needs to be the same
+        if config.settings != main_config.settings:
+            raise PlaceholderConfigError(f"{location}: The file '{config_path}' needs to use the same settings as the main placeholder file")
+        bake_flags = {name: placeholder.bake for name, placeholder in config.placeholders.items()}
+        main_bake_flags = {name: placeholder.bake for name, placeholder in main_config.placeholders.items()}
+        if bake_flags != main_bake_flags:
+            raise PlaceholderConfigError(f"{location}: The file '{config_path}' needs to define the same placeholders (with the same 'bake' values) as the main placeholder file")
+
+        page_processor = PageProcessor(config, main_page_processor.dynamic_placeholder_preprocessor.unique)
+        variants.append(BuildVariant(output_dir, config, page_processor))
+    return variants
+
+
+def build_variants(site_dir: str, plugin_config: PlaceholderPluginConfig, variants: list[BuildVariant], pages: list[VariantPage], page_settings_key: str) -> None:
+    """
+    Creates a copy of the site for each variant and replaces the pages and JavaScript data in it.
+    The markers in the main site need to be resolved afterwards (see resolve_markers_in_site), since they are copied to the variants
+    """
+    # Do not copy variants into each other (or into themselves)
+    variant_root_dirs = {variant.output_dir.split(os.sep)[0] for variant in variants}
+    ignore_variant_dirs = lambda directory, names: [name for name in names if directory == site_dir and name in variant_root_dirs]
+    workers = os.cpu_count() or 1
+
+    # Pages with the same front matter settings are processed together
+    page_groups: dict[str,list[VariantPage]] = {}
+    for page in pages:
+        page_groups.setdefault(repr(page.page_settings_data), []).append(page)
+
+    # The regex matching holds the global interpreter lock, so only processes can process pages in parallel.
+    # Starting them is slow, so all variants share the same processes and small sites are processed directly
+    pool = None
+    if workers > 1 and len(pages) * len(variants) >= MIN_PAGES_FOR_WORKER_PROCESSES:
+        pool = PageProcessorPool([variant.page_processor for variant in variants], workers)
+    try:
+        for variant in variants:
+            variant_site_dir = os.path.join(site_dir, variant.output_dir)
+            if os.path.exists(variant_site_dir):
+                shutil.rmtree(variant_site_dir)
+            shutil.copytree(site_dir, variant_site_dir, ignore=ignore_variant_dirs)
+
+            for group in page_groups.values():
+                page_processor = variant.page_processor
+                if group[0].page_settings_data:
+                    settings = parse_page_settings(group[0].page_settings_data, f"{group[0].file_path}:{page_settings_key}", variant.config.settings)
+                    page_processor = page_processor.for_settings(settings)
+
+                results = page_processor.process_pages([(page.file_path, page.content) for page in group], pool=pool)
+                for page, processed_content in zip(group, results):
+                    write_variant_page(variant_site_dir, page_processor, page, processed_content)
+
+            copy_javascript_to_directory(variant_site_dir, plugin_config, variant.config)
+            # Other files created from the pages (like the search index) still contain the markers
+            resolve_markers_in_site(variant_site_dir, variant.page_processor, set())
+            debug(f"Variant '{variant.output_dir}': Wrote {len(pages)} pages")
+    finally:
+        if pool:
+            pool.executor.shutdown()
+
+
+def write_variant_page(variant_site_dir: str, page_processor: PageProcessor, page: VariantPage, processed_content: str) -> None:
+    if page.processed_content in page.output:
+        output = page.output.replace(page.processed_content, processed_content, 1)
+    else:
+        # Should only happen, if the theme modifies the page's content
+        warning(f"{page.file_path}: Could not find the page's content in the output, so the variant uses the values from the main placeholder file")
+        output = page.output
+
+    # Resolves the markers outside of the content, like in the table of contents
+    output = resolve_markers_in_output(page_processor, output)
+    with open(os.path.join(variant_site_dir, page.dest_path), "w", encoding="utf-8") as f:
+        f.write(output)
+
+
+def resolve_markers_in_output(page_processor: PageProcessor, output: str) -> str:
+    """
+    Resolves the markers in a rendered page. The ids of headings contain the slugified markers, which are replaced with the placeholder names,
+    so that links to the headings are the same in all variants
+    """
+    unique = page_processor.dynamic_placeholder_preprocessor.unique
+    if unique not in output:
+        return output
+
+    output = page_processor.dynamic_placeholder_preprocessor.handle_html_page(output)
+    return replace_slugified_markers(unique, output)
+
+
+def replace_slugified_markers(unique: str, text: str) -> str:
+    # Slugify functions lower case the marker and may replace the underscores
+    return re.sub(f"x([a-z0-9_-]+?)[_-]{unique}[_-](?:dynamic|editable)x", r"\1", text)
+
+
+def resolve_markers_in_text(page_processor: PageProcessor, text: str, escape_for_string_literal: bool) -> str:
+    """
+    Resolves the markers in files that are not HTML pages, like the search index.
+    The markers are replaced with the HTML escaped default values, since the titles in the search index are HTML and themes insert the entries as HTML.
+    Set `escape_for_string_literal` for JSON and JavaScript files, where the markers are inside of strings
+    """
+    preprocessor = page_processor.dynamic_placeholder_preprocessor
+    def resolve(match: re.Match) -> str:
+        value = html.escape(preprocessor.config.expanded_default_values[get_token_match(match)[1]])
+        return json.dumps(value)[1:-1] if escape_for_string_literal else value
+
+    text = preprocessor.marker_regex.sub(resolve, text)
+    return replace_slugified_markers(preprocessor.unique, text)
+
+
+def resolve_markers_in_site(site_dir: str, page_processor: PageProcessor, ignored_dirs: set[str]) -> None:
+    """
+    Resolves the markers in all files of the site, that were not created by on_post_page (like the 404 page or the search index).
+    Shows a warning for each file, that still contains markers afterwards.
+    `ignored_dirs` are the names of subdirectories of `site_dir`, that should not be checked (the variants)
+    """
+    marker_id = f"_{page_processor.dynamic_placeholder_preprocessor.unique}_"
+    for directory, dir_names, file_names in os.walk(site_dir):
+        if directory == site_dir:
+            dir_names[:] = [name for name in dir_names if name not in ignored_dirs]
+        for file_name in file_names:
+            path = os.path.join(directory, file_name)
+            with open(path, "rb") as f:
+                data = f.read()
+            if marker_id.encode() not in data:
+                continue
+
+            extension = os.path.splitext(file_name)[1].lower()
+            try:
+                text = data.decode("utf-8")
+            except UnicodeDecodeError:
+                # Binary file, probably contains the marker by accident
+                text = ""
+            if text and extension in [".html", ".htm"]:
+                text = resolve_markers_in_output(page_processor, text)
+            elif text:
+                text = resolve_markers_in_text(page_processor, text, extension in [".json", ".js"])
+
+            if text:
+                with open(path, "w", encoding="utf-8", newline="") as f:
+                    f.write(text)
+            if not text or marker_id in text:
+                warning(f"{path}: Contains placeholder markers, that could not be resolved. Please report this as a bug")
@@ -0,0 +1,44 @@
+// Templates for computed placeholders. They are parsed by the Python code (see computed_template.py)
+
+export interface TemplateFilter {
+    name: string;
+    arguments: string[];
+}
+
+export interface TemplatePart {
+    // Literal text. Only used if placeholder is not set
+    text?: string;
+    placeholder?: string;
+    filters?: TemplateFilter[];
+}
+
+// Keep in sync with TEMPLATE_FILTERS in computed_template.py
+const TEMPLATE_FILTERS: Record<string, (value: string, ...args: string[]) => string> = {
+    "lower": (value) => value.toLowerCase(),
+    // Python's str.replace also replaces all occurences. The text to replace is never empty
+    "replace": (value, old_text, new_text) => value.split(old_text).join(new_text),
+    "upper": (value) => value.toUpperCase(),
+    "urlencode": (value) => encodeURIComponent(value),
+};
+
+// Turns the template into a function once, so that evaluating it only needs to apply the filters and join the parts
+export const compile_template = (parts: TemplatePart[]): ((args: Record<string, string>) => string) => {
+    const part_functions: ((args: Record<string, string>) => string)[] = parts.map(part => {
+        if (part.placeholder === undefined) {
+            const text = part.text ?? "";
+            return () => text;
+        }
+
+        const name = part.placeholder;
+        const filters = (part.filters ?? []).map(template_filter => {
+            const filter_function = TEMPLATE_FILTERS[template_filter.name];
+            if (!filter_function) {
+                throw new Error(`Unknown template filter: '${template_filter.name}'`);
+            }
+            return (value: string) => filter_function(value, ...template_filter.arguments);
+        });
+        return (args: Record<string, string>) => filters.reduce((value, filter) => filter(value), args[name] ?? "");
+    });
+
+    return (args: Record<string, string>) => part_functions.map(part_function => part_function(args)).join("");
+}
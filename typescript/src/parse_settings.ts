@@ -1,14 +1,20 @@
 import { load_checkbox_state, load_dropdown_state, load_textbox_state, load_boolean_setting, load_multiple_choice_setting } from "./state_manager";
 import { InputValidator, parse_validator } from "./validator";
 import { DependencyGraph } from "./dependency_graph";
+import { compile_template } from "./computed_template";
 
 export const VALID_INLINE_EDITOR_STYLES = ["simple", "icons", "custom"];
 
+// Like typeof, but returns "null" for null. Otherwise null would be accepted where an "object" is expected
+const type_name = (value: unknown): string => {
+    return value === null ? "null" : typeof(value);
+}
+
 // It parses random unspecified data, so any should be fine
 // eslint-disable-next-line @typescript-eslint/no-explicit-any
 export const assert_field_type = (name: string, expected_type_str: string, parent_object: any): any => {
     const value = parent_object[name];
-    const actual_type_str = typeof(value);
+    const actual_type_str = type_name(value);
     if (actual_type_str != expected_type_str) {
         throw new Error(`Type mismatch: ${name} should be ${expected_type_str}, but is ${actual_type_str}.\nProblematic object: ${JSON.stringify(parent_object)}`);
     } else {
@@ -38,7 +44,7 @@ export const get_array_field = (name: string, element_type: string, parent_objec
     const array = parent_object[name];
     if (Array.isArray(array)) {
         for (const [index, entry] of array.entries()) {
-            const actual_type_str = typeof(entry);
+            const actual_type_str = type_name(entry);
             if (actual_type_str != element_type) {
                 const msg = `Type mismatch: ${name}'s ${index+1}th element should be ${element_type}, but is ${actual_type_str}.\nProblematic object: ${JSON.stringify(parent_object)}`;
                 throw new Error(msg);
@@ -76,6 +82,8 @@ export interface InputTableRow {
 export interface PluginSettings {
     debug: boolean;
     delay_millis: number;
+    // Replace modes that should not be searched for (in addition to the ones disabled for the current page)
+    disabled_replace_modes: string[];
     apply_change_on_focus_change: boolean;
     expand_auto_tables: boolean;
     highlight_placeholders: boolean;
@@ -254,6 +262,7 @@ const parse_settings = (data: any): PluginSettings => {
         "apply_change_on_focus_change": load_boolean_setting("apply_change_on_focus_change", apply_change_on_focus_change_default),
         "debug": load_boolean_setting("debug", debug_default),
         "delay_millis": get_number_field("delay_millis", data),
+        "disabled_replace_modes": get_array_field("disabled_replace_modes", "string", data),
         "expand_auto_tables": load_boolean_setting("expand_auto_tables", expand_auto_tables_default),
         "highlight_placeholders": load_boolean_setting("highlight_placeholders", false),
         "inline_editors": load_boolean_setting("inline_editors", inline_editors),
@@ -436,24 +445,34 @@ const finish_parse_dropdown = (parsed: BasePlaceholer, data: any): DropdownPlace
 // eslint-disable-next-line @typescript-eslint/no-explicit-any
 const finish_parse_computed = (parsed: BasePlaceholer, data: any): ComputedPlaceholder => {
     const computed_depends_on: string[] = get_array_field("computed_depends_on", "string", data);
-    const function_body: string = get_string_field("computed_function", data);
 
     // Build the compiled function: it receives an object with dependency values and returns a string
-    const compiled_function = (args: Record<string, string>): string => {
-        try {
-            // Build parameter list and values in the same order as computed_depends_on
-            const param_names = computed_depends_on;
-            const param_values = computed_depends_on.map(dep => args[dep] ?? "");
-            const fn = new Function(...param_names, function_body);
-            const result = fn(...param_values);
-            if (typeof result !== "string") {
-                throw new Error(`Computed function for '${parsed.name}' must return a string, but returned ${typeof result}: ${result}`);
+    let compiled_function: (args: Record<string, string>) => string;
+    if (data.computed_template !== undefined) {
+        // Templates do not need to be evaluated with new Function, since they only consist of text, placeholders, and filters
+        compiled_function = compile_template(get_array_field("computed_template", "object", data));
+    } else {
+        const function_body: string = get_string_field("computed_function", data);
+        // Created when the function is first needed and then reused
+        let fn: ((...values: string[]) => unknown) | undefined = undefined;
+        compiled_function = (args: Record<string, string>): string => {
+            try {
+                // Build parameter list and values in the same order as computed_depends_on
+                const param_names = computed_depends_on;
+                const param_values = computed_depends_on.map(dep => args[dep] ?? "");
+                if (!fn) {
+                    fn = new Function(...param_names, function_body) as (...values: string[]) => unknown;
+                }
+                const result = fn(...param_values);
+                if (typeof result !== "string") {
+                    throw new Error(`Computed function for '${parsed.name}' must return a string, but returned ${typeof result}: ${result}`);
+                }
+                return result;
+            } catch (error) {
+                throw new Error(`Failed to evaluate computed_function for placeholder '${parsed.name}'`, { cause: error });
             }
-            return result;
-        } catch (error) {
-            throw new Error(`Failed to evaluate computed_function for placeholder '${parsed.name}'`, { cause: error });
-        }
-    };
+        };
+    }
 
     const description = parsed.description ? `\nDescription: ${parsed.description}` : "";
     const default_tooltip = `Placeholder name: ${parsed.name}${description}\nThis is a computed (read-only) placeholder. Its value is automatically derived from: ${computed_depends_on.join(", ")}`;
@@ -190,15 +190,47 @@ const do_html_replace = (root_element: Element, placeholder: Placeholder): void
 }
 
 
+// Returns the replace modes that are disabled for the whole site or (via the page's front matter) for the current page
+const get_disabled_replace_modes = (config: PluginConfig): Set<string> => {
+    const disabled_modes = new Set(config.settings.disabled_replace_modes);
+    const page_settings = document.querySelector("[data-placeholder-disabled-replace-modes]");
+    const page_modes = page_settings?.getAttribute("data-placeholder-disabled-replace-modes");
+    if (page_modes) {
+        for (const mode of page_modes.split(",")) {
+            disabled_modes.add(mode);
+        }
+    }
+    return disabled_modes;
+}
+
 // Replace all placeholders in the given order and return which placeholders actually were actually found in the page
 export const replace_placeholders_in_subtree = (root_element: Element, config: PluginConfig): void => {
+    // Disabled modes are skipped entirely, so that the page is not searched for them
+    const disabled_modes = get_disabled_replace_modes(config);
+    const use_dynamic = !disabled_modes.has("dynamic");
+    const use_editable = !disabled_modes.has("editable");
+    const use_html = !disabled_modes.has("html");
+    const use_normal = !disabled_modes.has("normal");
+    const use_static = !disabled_modes.has("static");
+    if (disabled_modes.size > 0) {
+        logger.debug("Disabled replace modes:", [...disabled_modes]);
+    }
+
     for (const placeholder of config.placeholders.values()) {
-        do_dynamic_replace(root_element, placeholder);
-        do_editable_replace(root_element, placeholder);
-        do_normal_replace(root_element, placeholder, config);
-        do_static_replace(root_element, placeholder);
+        if (use_dynamic) {
+            do_dynamic_replace(root_element, placeholder);
+        }
+        if (use_editable) {
+            do_editable_replace(root_element, placeholder);
+        }
+        if (use_normal) {
+            do_normal_replace(root_element, placeholder, config);
+        }
+        if (use_static) {
+            do_static_replace(root_element, placeholder);
+        }
 
-        if (placeholder.allow_inner_html) {
+        if (use_html && placeholder.allow_inner_html) {
             do_html_replace(root_element, placeholder);
         }
     }